@@ -0,0 +1,195 @@
+"""
+Action Server Launcher for Driving License Management System
+This file contains the launcher that runs several action server worker processes
+on one shared listening socket, restarts workers that die and shuts them down
+gracefully, so a single container can use all of its cores.
+
+Usage: python action_launcher.py [--workers N] [--port 5055] [--cors "*"]
+"""
+
+import argparse
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+import logging
+
+import log_stuff
+import metrics_stuff
+
+logger = logging.getLogger("action_launcher")
+
+# Number of worker processes (defaults to the number of CPUs available to the container)
+WORKERS = int(os.getenv("ACTION_SERVER_WORKERS", "0")) or (
+    len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+HOST = os.getenv("SANIC_HOST", "0.0.0.0")
+PORT = int(os.getenv("ACTION_SERVER_PORT", "5055"))
+BACKLOG = int(os.getenv("ACTION_SERVER_BACKLOG", "1024"))
+# Seconds workers get to finish in-flight requests after SIGTERM before they are killed
+GRACEFUL_TIMEOUT = float(os.getenv("ACTION_SERVER_GRACEFUL_TIMEOUT", "15"))
+# A worker that dies sooner than this after starting is restarted with backoff
+MIN_UPTIME = float(os.getenv("ACTION_SERVER_MIN_UPTIME", "10"))
+MAX_RESTART_DELAY = 30.0
+# How often the launcher checks for exited workers and restarts that are due
+REAP_INTERVAL = 0.2
+
+def create_socket(host: str, port: int, backlog: int = BACKLOG) -> socket.socket:
+    """Bind the listening socket once, before forking, so every worker accepts on it."""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def serve(sock: socket.socket, actions: str, cors: str) -> None:
+    """Run one action server worker on the shared socket (in the forked child)."""
+    from rasa_sdk.endpoint import create_app
+    from rasa_sdk.plugin import plugin_manager
+
+    app = create_app(actions, cors_origins=cors)
+    plugin_manager().hook.attach_sanic_app_extensions(app=app)
+    # Sanic installs its own SIGINT/SIGTERM handlers and drains connections on shutdown
+    app.config.GRACEFUL_SHUTDOWN_TIMEOUT = GRACEFUL_TIMEOUT
+    app.run(sock=sock, workers=1, access_log=False)
+
+class Supervisor:
+    """Forks the workers, restarts those that exit and stops them all on SIGTERM/SIGINT."""
+
+    def __init__(self, sock: socket.socket, actions: str, cors: str, workers: int = WORKERS):
+        self.sock = sock
+        self.actions = actions
+        self.cors = cors
+        self.workers = workers
+        self.stopping = False
+        self._pids: Dict[int, int] = {}  # pid -> worker slot
+        self._started_at: Dict[int, float] = {}  # slot -> start time
+        self._restart_delay: Dict[int, float] = {}  # slot -> backoff for the next crash
+        self._restart_at: Dict[int, float] = {}  # slot -> when its replacement is started
+
+    def run(self) -> int:
+        """Start the workers and supervise them until shutdown; returns the exit code."""
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        # Poll instead of blocking in os.wait(), so one worker's restart backoff
+        # does not hold up reaping and restarting the others
+        while self._pids or (self._restart_at and not self.stopping):
+            if not self.stopping:
+                self._start_due_workers()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._pids.clear()
+                pid = 0
+            if pid == 0:
+                time.sleep(REAP_INTERVAL)
+                continue
+
+            slot = self._pids.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.monotonic() - self._started_at[slot]
+            delay = self._next_restart_delay(slot, uptime)
+            logger.warning(f"Worker {slot} (pid {pid}) exited with code {code} after {uptime:.0f}s; "
+                           f"restarting in {delay:.0f}s")
+            self._restart_at[slot] = time.monotonic() + delay
+
+        self.sock.close()
+        logger.info("Action server stopped")
+        return 0
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                serve(self.sock, self.actions, self.cors)
+            except BaseException:
+                logger.exception(f"Worker {slot} failed")
+                code = 1
+            finally:
+                # Skip the parent's atexit handlers and buffers inherited through fork,
+                # but write out what the worker logged, including the traceback above
+                log_stuff.stop_logging()
+                logging.shutdown()
+                os._exit(code)
+
+        self._pids[pid] = slot
+        self._started_at[slot] = time.monotonic()
+        logger.info(f"Started worker {slot} (pid {pid})")
+
+    def _start_due_workers(self) -> None:
+        now = time.monotonic()
+        for slot, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[slot]
+                self._spawn(slot)
+
+    def _next_restart_delay(self, slot: int, uptime: float) -> float:
+        """Restart at once after a long run; back off when a worker keeps crashing."""
+        if uptime >= MIN_UPTIME:
+            self._restart_delay[slot] = 0.0
+            return 0.0
+        delay = min(MAX_RESTART_DELAY, max(1.0, self._restart_delay.get(slot, 0.0) * 2))
+        self._restart_delay[slot] = delay
+        return delay
+
+    def _handle_stop(self, signum: int, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Received {signal.Signals(signum).name}, stopping {len(self._pids)} workers")
+        for pid in self._pids:
+            self._signal(pid, signal.SIGTERM)
+        # Force the stragglers out once the grace period is over
+        signal.signal(signal.SIGALRM, self._handle_timeout)
+        signal.setitimer(signal.ITIMER_REAL, GRACEFUL_TIMEOUT + 1)
+
+    def _handle_timeout(self, signum: int, frame) -> None:
+        for pid in self._pids:
+            logger.warning(f"Worker pid {pid} did not stop in time, killing it")
+            self._signal(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the action server with several worker processes.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="number of worker processes")
+    parser.add_argument("--port", type=int, default=PORT, help="port to listen on")
+    parser.add_argument("--actions", default="actions", help="package to load actions from")
+    parser.add_argument("--cors", default="*", help="allowed CORS origins")
+    args = parser.parse_args(argv)
+
+    from rasa_sdk import utils
+    utils.configure_colored_logging(os.getenv("LOG_LEVEL", "INFO").upper())
+    utils.update_sanic_log_level()
+
+    # Import the actions once in the launcher: errors show up before any worker is
+    # forked, and the workers share the loaded code copy-on-write
+    importlib.import_module(args.actions)
+
+    sock = create_socket(HOST, args.port)
+    logger.info(f"Action server listening on {HOST}:{args.port} with {max(1, args.workers)} workers")
+    if args.workers > 1 and metrics_stuff.METRICS_ENABLED and metrics_stuff.PROMETHEUS_ENABLED:
+        logger.warning("GET /metrics only shows the metrics of the worker that accepts the scrape; "
+                       "export metrics via OTLP and set OTEL_METRICS_PROMETHEUS_ENABLED=false")
+    return Supervisor(sock, args.actions, args.cors, max(1, args.workers)).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
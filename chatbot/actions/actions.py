@@ -4,7 +4,7 @@
 # See this guide on how to implement these action:
 # https://rasa.com/docs/rasa/custom-actions
 
-from typing import Any, Text, Dict, List
+from typing import Any, Text, Dict, List, Optional
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet, SessionStarted, ActionExecuted
@@ -12,18 +12,22 @@ import re
 import logging
 from datetime import datetime, timedelta
 import random
-import requests
 import json
 from urllib.parse import urljoin
 
+import log_stuff
 import trace_stuff
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+log_stuff.configure_logging()
 logger = logging.getLogger(__name__)
 
 # Import API configuration
-from api_config import APIConfig, APIResponse, APIError, format_license_number, parse_api_date, mask_sensitive_data
+from api_config import (APIConfig, APIResponse, APIError, LicenseRecord, format_license_number, format_api_date,
+                        mask_sensitive_data)
+from api_client import get_async_client
+from api_resilience import with_bulkhead, with_deadline
+from write_queue import get_write_queue
 
 def build_auth_headers_from_tracker(tracker: Tracker) -> Dict[str, str]:
     """Build Authorization headers using user's token from message metadata when available.
@@ -44,20 +48,61 @@ def build_auth_headers_from_tracker(tracker: Tracker) -> Dict[str, str]:
         pass
     return APIConfig.get_auth_headers()
 
+def outdated_notice(license_data: Optional[LicenseRecord]) -> str:
+    """Get the note appended to answers built from a possibly outdated license record."""
+    if license_data is None or not license_data.is_possibly_outdated():
+        return ""
+    return (f"\n\n⚠️ Our license service isn't responding right now, so this is based on your "
+            f"license details as of {license_data.fetched_at_display()} and may be outdated.")
 
 
-class ActionSessionStarted(Action):
-    """Action to handle session start and reset authentication."""
+
+class ActionSessionStart(Action):
+    """Action to handle session start and reset authentication.
+
+    Overrides Rasa's default `action_session_start`, so it has to start the
+    session itself: SessionStarted, the carried-over slots, then action_listen.
+    """
     
     def name(self) -> Text:
-        return "action_session_started"
+        return "action_session_start"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        
+        if APIConfig.PREFETCH_ON_SESSION_START:
+            self._prefetch_license_details(tracker)
+        
+        events = [SessionStarted()]
+        if domain.get("session_config", {}).get("carry_over_slots_to_new_session", True):
+            events.extend(self._carried_over_slots(tracker))
         
         # Reset authentication on session start
-        return [SlotSet("authenticated", False)]
+        events.append(SlotSet("authenticated", False))
+        events.append(ActionExecuted("action_listen"))
+        return events
+    
+    @staticmethod
+    def _carried_over_slots(tracker: Tracker) -> List[Dict[Text, Any]]:
+        """Get SlotSet events for the slots set in the previous session."""
+        return [SlotSet(key=event.get("name"), value=event.get("value"))
+                for event in tracker.events if event.get("event") == "slot"]
+    
+    def _prefetch_license_details(self, tracker: Tracker) -> None:
+        """Start loading the user's license record so the first question is answered from cache."""
+        # Rasa passes the metadata of the message that started the session in a slot
+        metadata = (tracker.latest_message or {}).get("metadata") or tracker.get_slot("session_started_metadata") or {}
+        user_token = metadata.get("token")
+        if not user_token:
+            # Without the user's own token there is no record to load
+            return
+        
+        get_async_client().prefetch_license_details({
+            "Authorization": f"Bearer {user_token}",
+            "Content-Type": "application/json",
+        })
 
 class ActionResetAuthentication(Action):
     """Action to reset user authentication."""
@@ -65,9 +110,10 @@ class ActionResetAuthentication(Action):
     def name(self) -> Text:
         return "action_reset_authentication"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         return [SlotSet("authenticated", False)]
 
@@ -77,9 +123,12 @@ class ActionValidateLicense(Action):
     def name(self) -> Text:
         return "action_validate_license"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("reads")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         license_number = tracker.get_slot("license_number")
@@ -94,7 +143,7 @@ class ActionValidateLicense(Action):
             return []
         
         # Check if license exists using API
-        if not self._license_exists(license_number, headers):
+        if not await self._license_exists(license_number, headers):
             dispatcher.utter_message(text=f"❌ License number {license_number} not found in our system. Please check the number and try again.")
             return []
         
@@ -114,25 +163,17 @@ class ActionValidateLicense(Action):
         return bool(re.match(r'^[A-Za-z0-9]+$', clean_number))
     
     @trace_stuff.trace_stuff("license_exists")
-    def _license_exists(self, license_number: str, headers: Dict[str, str]) -> bool:
+    async def _license_exists(self, license_number: str, headers: Dict[str, str]) -> bool:
         """Check if license exists using API."""
         try:
             # Call the API to check if license exists
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                params={"licenseNumber": license_number},
-                timeout=APIConfig.TIMEOUT
+            license_data = await get_async_client().get_license_details(
+                headers,
+                params={"licenseNumber": license_number}
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
-            else:
-                logger.warning(f"API call failed with status {response.status_code}")
-                return False
+            return license_data is not None
                 
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -142,9 +183,12 @@ class ActionAuthenticateUser(Action):
     def name(self) -> Text:
         return "action_authenticate_user"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("reads")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         license_number = tracker.get_slot("license_number")
@@ -154,82 +198,48 @@ class ActionAuthenticateUser(Action):
             dispatcher.utter_message(text="❌ Both license number and name are required for authentication.")
             return []
         
-        # Authenticate using API
-        if self._authenticate_user(license_number, full_name, headers):
-            # Get license details to show user after successful authentication
-            license_info = self._get_license_info(license_number, headers)
+        # Fetch the license record once and use it for both verification and display
+        license_info = await self._get_license_info(license_number, headers)
+        
+        if self._authenticate_user(full_name, license_info):
+            # Mask license number for security
+            masked_license = mask_sensitive_data(license_info.license_number)
             
-            if license_info:
-                # Mask license number for security
-                masked_license = mask_sensitive_data(license_info['licenseNumber'])
-                
-                dispatcher.utter_message(
-                    text=f"✅ Authentication successful! Here are your license details:\n\n"
-                         f"👤 Name: {license_info['firstName']} {license_info['lastName']}\n"
-                         f"🔢 License #: {masked_license}\n"
-                         f"🚗 Vehicle Type: {license_info['vehicleType']}\n"
-                         f"🚗 Vehicle Make: {license_info['vehicleMake']}\n"
-                         f"📅 Issue Date: {parse_api_date(license_info['issueDate'])}\n"
-                         f"📅 Expiry Date: {parse_api_date(license_info['expirationDate'])}\n"
-                         f"📍 Address: {license_info['address']}"
-                )
-            else:
-                dispatcher.utter_message(
-                    text="✅ Authentication successful! However, I couldn't retrieve your license details at the moment."
-                )
+            dispatcher.utter_message(
+                text=f"✅ Authentication successful! Here are your license details:\n\n"
+                     f"👤 Name: {license_info.full_name}\n"
+                     f"🔢 License #: {masked_license}\n"
+                     f"🚗 Vehicle Type: {license_info.vehicle_type}\n"
+                     f"🚗 Vehicle Make: {license_info.vehicle_make}\n"
+                     f"📅 Issue Date: {format_api_date(license_info.issue_date)}\n"
+                     f"📅 Expiry Date: {format_api_date(license_info.expiration_date)}\n"
+                     f"📍 Address: {license_info.address}"
+                     f"{outdated_notice(license_info)}"
+            )
             
             return [SlotSet("authenticated", True)]
         else:
             dispatcher.utter_message(text="❌ Authentication failed. The name doesn't match the license number. Please try again.")
             return [SlotSet("authenticated", False)]
     
-    @trace_stuff.trace_stuff("authenticate_user")
-    def _authenticate_user(self, license_number: str, full_name: str, headers: Dict[str, str]) -> bool:
-        """Authenticate user using API."""
-        try:
-            # Call the API to get license details and verify name
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                timeout=APIConfig.TIMEOUT
-            )
-            print(response.json())
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and data.get("data"):
-                    license_data = data["data"]
-                    api_first_name = license_data.get("firstName", "")
-                    api_last_name = license_data.get("lastName", "")
-                    api_full_name = f"{api_first_name} {api_last_name}".strip()
-                    
-                    # Compare names (case-insensitive)
-                    return full_name.strip().lower() == api_full_name.lower()
-            
-            return False
-            
-        except requests.RequestException as e:
-            logger.error(f"API call failed: {e}")
+    def _authenticate_user(self, full_name: str, license_data: Optional[LicenseRecord]) -> bool:
+        """Verify the provided name against the license record from the API."""
+        if not license_data:
             return False
+        
+        # Compare names (case-insensitive)
+        return full_name.strip().lower() == license_data.full_name.lower()
     
     @trace_stuff.trace_stuff("get_license_info")
-    def _get_license_info(self, license_number: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    async def _get_license_info(self, license_number: str, headers: Dict[str, str]) -> Optional[LicenseRecord]:
         """Get comprehensive license information from API."""
         try:
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                params={"licenseNumber": license_number},
-                timeout=APIConfig.TIMEOUT
+            return await get_async_client().get_license_details(
+                headers,
+                params={"licenseNumber": license_number}
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and data.get("data"):
-                    return data["data"]
-            
-            return None
-            
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return None
 
@@ -239,9 +249,12 @@ class ActionCheckLicenseStatus(Action):
     def name(self) -> Text:
         return "action_check_license_status"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("reads")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         # Get license number from user's session/profile (you'll need to implement this)
@@ -250,15 +263,17 @@ class ActionCheckLicenseStatus(Action):
         #     dispatcher.utter_message(text="❌ Unable to retrieve your license information. Please contact support.")
         #     return []
         
-        status_info = self._get_license_status( headers)
+        status_info = await self._get_license_status( headers)
         
         if status_info["status"] == "active":
             dispatcher.utter_message(
                 text=f"✅ Great news! Your license is currently ACTIVE and valid until {status_info['expiry_date']}. You're all set to drive!"
+                     f"{status_info.get('notice', '')}"
             )
         elif status_info["status"] == "expired":
             dispatcher.utter_message(
                 text=f"⚠️ Your license has EXPIRED on {status_info['expiry_date']}. You'll need to renew it before you can drive legally. Would you like me to help you with the renewal process?"
+                     f"{status_info.get('notice', '')}"
             )
         elif status_info["status"] == "suspended":
             dispatcher.utter_message(
@@ -270,44 +285,34 @@ class ActionCheckLicenseStatus(Action):
         return []
     
     @trace_stuff.trace_stuff("get_license_status")
-    def _get_license_status(self, headers: Dict[str, str]) -> Dict[str, str]:
+    async def _get_license_status(self, headers: Dict[str, str]) -> Dict[str, str]:
         """Get license status from API."""
         try:
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                timeout=APIConfig.TIMEOUT
-            )
-            print(response.json())
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and data.get("data"):
-                    license_data = data["data"]
-                    expiration_date = license_data.get("expirationDate", "")
-                    
-                    # Parse expiration date and determine status
-                    try:
-                        exp_date = datetime.fromisoformat(expiration_date.replace('Z', '+00:00'))
-                        current_date = datetime.now(exp_date.tzinfo)
-                        
-                        if exp_date > current_date:
-                            return {
-                                "status": "active",
-                                "expiry_date": exp_date.strftime("%Y-%m-%d")
-                            }
-                        else:
-                            return {
-                                "status": "expired",
-                                "expiry_date": exp_date.strftime("%Y-%m-%d")
-                            }
-                    except ValueError:
-                        logger.error(f"Invalid date format: {expiration_date}")
-                        return {"status": "unknown", "expiry_date": "N/A"}
+            license_data = await get_async_client().get_license_details(headers)
+            if license_data:
+                # Expiration date is parsed when the record is decoded
+                exp_date = license_data.expiration_date
+                if exp_date is None:
+                    return {"status": "unknown", "expiry_date": "N/A"}
+                
+                current_date = datetime.now(exp_date.tzinfo)
+                
+                if exp_date > current_date:
+                    return {
+                        "status": "active",
+                        "expiry_date": format_api_date(exp_date),
+                        "notice": outdated_notice(license_data)
+                    }
+                else:
+                    return {
+                        "status": "expired",
+                        "expiry_date": format_api_date(exp_date),
+                        "notice": outdated_notice(license_data)
+                    }
             
             return {"status": "unknown", "expiry_date": "N/A"}
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return {"status": "unknown", "expiry_date": "N/A"}
     
@@ -319,9 +324,12 @@ class ActionViewLicenseInfo(Action):
     def name(self) -> Text:
         return "action_view_license_info"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("reads")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         license_number = get_user_license_number(tracker)
@@ -329,21 +337,22 @@ class ActionViewLicenseInfo(Action):
             dispatcher.utter_message(text="❌ Unable to retrieve your license information. Please contact support.")
             return []
         
-        license_info = self._get_license_info(license_number, headers)
+        license_info = await self._get_license_info(license_number, headers)
         
         if license_info:
             # Mask license number for security
-            masked_license = mask_sensitive_data(license_info['licenseNumber'])
+            masked_license = mask_sensitive_data(license_info.license_number)
             
             dispatcher.utter_message(
                 text=f"📋 Here are your license details:\n\n"
-                     f"👤 Name: {license_info['firstName']} {license_info['lastName']}\n"
+                     f"👤 Name: {license_info.full_name}\n"
                      f"🔢 License #: {masked_license}\n"
-                     f"🚗 Vehicle Type: {license_info['vehicleType']}\n"
-                     f"🚗 Vehicle Make: {license_info['vehicleMake']}\n"
-                     f"📅 Issue Date: {parse_api_date(license_info['issueDate'])}\n"
-                     f"📅 Expiry Date: {parse_api_date(license_info['expirationDate'])}\n"
-                     f"📍 Address: {license_info['address']}"
+                     f"🚗 Vehicle Type: {license_info.vehicle_type}\n"
+                     f"🚗 Vehicle Make: {license_info.vehicle_make}\n"
+                     f"📅 Issue Date: {format_api_date(license_info.issue_date)}\n"
+                     f"📅 Expiry Date: {format_api_date(license_info.expiration_date)}\n"
+                     f"📍 Address: {license_info.address}"
+                     f"{outdated_notice(license_info)}"
             )
         else:
             dispatcher.utter_message(text="❌ Unable to retrieve license information. Please contact our support team.")
@@ -351,24 +360,15 @@ class ActionViewLicenseInfo(Action):
         return []
     
     @trace_stuff.trace_stuff("get_license_info")
-    def _get_license_info(self, license_number: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    async def _get_license_info(self, license_number: str, headers: Dict[str, str]) -> Optional[LicenseRecord]:
         """Get comprehensive license information from API."""
         try:
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                params={"licenseNumber": license_number},
-                timeout=APIConfig.TIMEOUT
+            return await get_async_client().get_license_details(
+                headers,
+                params={"licenseNumber": license_number}
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and data.get("data"):
-                    return data["data"]
-            
-            return None
-            
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return None
     
@@ -380,16 +380,24 @@ class ActionRenewLicense(Action):
     def name(self) -> Text:
         return "action_renew_license"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
         # Process renewal using API
-        renewal_result = self._process_renewal(headers)
+        renewal_result = await self._process_renewal(headers)
         
-        if renewal_result["success"]:
+        if renewal_result["success"] and APIConfig.WRITE_BEHIND_ENABLED:
+            dispatcher.utter_message(
+                text="🔄 Your renewal request has been received and will be processed shortly. "
+                     "You'll receive a confirmation email with payment instructions once it goes through."
+            )
+        elif renewal_result["success"]:
             dispatcher.utter_message(
                 text="🔄 Your license renewal has been initiated! "
                      "You'll receive a confirmation email with payment instructions. "
@@ -401,23 +409,25 @@ class ActionRenewLicense(Action):
         return []
     
     @trace_stuff.trace_stuff("process_renewal")
-    def _process_renewal(self, headers: Dict[str, str]) -> Dict[str, Any]:
+    async def _process_renewal(self, headers: Dict[str, str]) -> Dict[str, Any]:
         """Process license renewal using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("renew_license"),
-                headers=headers,
-                timeout=APIConfig.TIMEOUT
+            if APIConfig.WRITE_BEHIND_ENABLED:
+                return {"success": await get_write_queue().submit("renew_license", headers)}
+            
+            response = await get_async_client().post(
+                "renew_license",
+                headers=headers
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return {"success": data.get("success", False)}
+                api_response = APIResponse.from_json(response.content)
+                return {"success": api_response.success}
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return {"success": False}
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return {"success": False}
 
@@ -427,14 +437,17 @@ class ActionRequestDuplicate(Action):
     def name(self) -> Text:
         return "action_request_duplicate"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
         # Process duplicate request using API
-        request_result = self._process_duplicate_request(headers)
+        request_result = await self._process_duplicate_request(headers)
         
         if request_result["success"]:
             dispatcher.utter_message(
@@ -448,23 +461,22 @@ class ActionRequestDuplicate(Action):
         return []
     
     @trace_stuff.trace_stuff("process_duplicate_request")
-    def _process_duplicate_request(self, headers: Dict[str, str]) -> Dict[str, Any]:
+    async def _process_duplicate_request(self, headers: Dict[str, str]) -> Dict[str, Any]:
         """Process duplicate license request using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("duplicate_license"),
-                headers=headers,
-                timeout=APIConfig.TIMEOUT
+            response = await get_async_client().post(
+                "duplicate_license",
+                headers=headers
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return {"success": data.get("success", False)}
+                api_response = APIResponse.from_json(response.content)
+                return {"success": api_response.success}
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return {"success": False}
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return {"success": False}
 
@@ -474,9 +486,12 @@ class ActionAddVehicleType(Action):
     def name(self) -> Text:
         return "action_add_vehicle_type"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
@@ -486,7 +501,7 @@ class ActionAddVehicleType(Action):
             return []
         
         # Process vehicle type addition using API
-        success = self._add_vehicle_type(vehicle_type, headers)
+        success = await self._add_vehicle_type(vehicle_type, headers)
         
         if success:
             dispatcher.utter_message(
@@ -499,24 +514,23 @@ class ActionAddVehicleType(Action):
         return []
     
     @trace_stuff.trace_stuff("add_vehicle_type")
-    def _add_vehicle_type(self, vehicle_type: str, headers: Dict[str, str]) -> bool:
+    async def _add_vehicle_type(self, vehicle_type: str, headers: Dict[str, str]) -> bool:
         """Add vehicle type to license using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("add_vehicle_type"),
+            response = await get_async_client().post(
+                "add_vehicle_type",
                 headers=headers,
-                json={"vehicleType": vehicle_type},
-                timeout=APIConfig.TIMEOUT
+                json={"vehicleType": vehicle_type}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -526,9 +540,12 @@ class ActionRemoveVehicleType(Action):
     def name(self) -> Text:
         return "action_remove_vehicle_type"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
@@ -538,7 +555,7 @@ class ActionRemoveVehicleType(Action):
             return []
         
         # Process vehicle type removal using API
-        success = self._remove_vehicle_type(vehicle_type, headers)
+        success = await self._remove_vehicle_type(vehicle_type, headers)
         
         if success:
             dispatcher.utter_message(
@@ -551,24 +568,23 @@ class ActionRemoveVehicleType(Action):
         return []
     
     @trace_stuff.trace_stuff("remove_vehicle_type")
-    def _remove_vehicle_type(self, vehicle_type: str, headers: Dict[str, str]) -> bool:
+    async def _remove_vehicle_type(self, vehicle_type: str, headers: Dict[str, str]) -> bool:
         """Remove vehicle type from license using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("remove_vehicle_type"),
+            response = await get_async_client().post(
+                "remove_vehicle_type",
                 headers=headers,
-                json={"vehicleType": vehicle_type},
-                timeout=APIConfig.TIMEOUT
+                json={"vehicleType": vehicle_type}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -578,9 +594,12 @@ class ActionChangeAddress(Action):
     def name(self) -> Text:
         return "action_change_address"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
@@ -590,10 +609,15 @@ class ActionChangeAddress(Action):
             return []
         
         # Process address change using API
-        print("New address processing ----",new_address)
-        success = self._update_address(new_address, headers)
+        log_stuff.debug_payload(logger, "change_address_request", {"address": new_address})
+        success = await self._update_address(new_address, headers)
         
-        if success:
+        if success and APIConfig.WRITE_BEHIND_ENABLED:
+            dispatcher.utter_message(
+                text="✅ Your address change has been received and will be applied shortly. "
+                     "You'll receive a confirmation email once it goes through."
+            )
+        elif success:
             dispatcher.utter_message(
                 text="✅ Your address has been updated successfully! "
                      "You'll receive a confirmation email within 24 hours."
@@ -604,24 +628,26 @@ class ActionChangeAddress(Action):
         return []
 
     @trace_stuff.trace_stuff("update_address")
-    def _update_address(self, new_address: str, headers: Dict[str, str]) -> bool:
+    async def _update_address(self, new_address: str, headers: Dict[str, str]) -> bool:
         """Update license address using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("change_address"),
+            if APIConfig.WRITE_BEHIND_ENABLED:
+                return await get_write_queue().submit("change_address", headers, params={"address": new_address})
+            
+            response = await get_async_client().post(
+                "change_address",
                 headers=headers,
-                params={"address": new_address},
-                timeout=APIConfig.TIMEOUT
+                params={"address": new_address}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
                 
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -631,9 +657,12 @@ class ActionChangeContact(Action):
     def name(self) -> Text:
         return "action_change_contact"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
@@ -643,7 +672,7 @@ class ActionChangeContact(Action):
             return []
         
         # Process contact change using API
-        success = self._update_contact(new_contact, headers)
+        success = await self._update_contact(new_contact, headers)
         
         if success:
             dispatcher.utter_message(
@@ -656,24 +685,23 @@ class ActionChangeContact(Action):
         return []
     
     @trace_stuff.trace_stuff("update_contact")
-    def _update_contact(self, new_contact: str, headers: Dict[str, str]) -> bool:
+    async def _update_contact(self, new_contact: str, headers: Dict[str, str]) -> bool:
         """Update license contact information using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("update_contact"),
+            response = await get_async_client().post(
+                "update_contact",
                 headers=headers,
-                json={"newContact": new_contact},
-                timeout=APIConfig.TIMEOUT
+                json={"newContact": new_contact}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -683,9 +711,12 @@ class ActionUpdateLicenseStatus(Action):
     def name(self) -> Text:
         return "action_update_license_status"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         # license_number = get_user_license_number(tracker)
@@ -720,9 +751,15 @@ class ActionUpdateLicenseStatus(Action):
             return []
         
         # Update license status
-        success = self._update_license_status(new_status.upper(), headers)
+        success = await self._update_license_status(new_status.upper(), headers)
         
-        if success:
+        if success and APIConfig.WRITE_BEHIND_ENABLED:
+            dispatcher.utter_message(
+                text=f"✅ Your request to update your license status to {new_status.upper()} has been received "
+                     "and will be applied shortly.\n\n"
+                     "You'll receive a confirmation email once it goes through."
+            )
+        elif success:
             dispatcher.utter_message(
                 text=f"✅ Your license status has been updated to {new_status.upper()} successfully!\n\n"
                      "You'll receive a confirmation email within 24 hours."
@@ -733,24 +770,26 @@ class ActionUpdateLicenseStatus(Action):
         return []
     
     @trace_stuff.trace_stuff("update_license_status")
-    def _update_license_status(self, new_status: str, headers: Dict[str, str]) -> bool:
+    async def _update_license_status(self, new_status: str, headers: Dict[str, str]) -> bool:
         """Update license status using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("update_license_status"),
+            if APIConfig.WRITE_BEHIND_ENABLED:
+                return await get_write_queue().submit("update_license_status", headers, params={"status": new_status})
+            
+            response = await get_async_client().post(
+                "update_license_status",
                 headers=headers,
-                params={"status": new_status},
-                timeout=APIConfig.TIMEOUT
+                params={"status": new_status}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
                 
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -760,14 +799,17 @@ class ActionLicenseNotReceived(Action):
     def name(self) -> Text:
         return "action_license_not_received"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    @with_deadline()
+    @with_bulkhead("updates")
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         headers = build_auth_headers_from_tracker(tracker)
         
         # First, get current license status
-        current_status = self._get_current_license_status(headers)
+        current_status = await self._get_current_license_status(headers)
         
         if current_status:
             dispatcher.utter_message(
@@ -776,9 +818,17 @@ class ActionLicenseNotReceived(Action):
             )
             
             # Update status to DELIVERED
-            success = self._update_license_status("DELIVERED", headers)
+            success = await self._update_license_status("DELIVERED", headers)
             
-            if success:
+            if success and APIConfig.WRITE_BEHIND_ENABLED:
+                dispatcher.utter_message(
+                    text="✅ I've requested the update of your license status to DELIVERED. "
+                         "It will be applied shortly.\n\n"
+                         "If you still haven't received your license within 2-3 business days, "
+                         "please contact our support team at 1-800-LICENSE for assistance.\n\n"
+                         "📧 You'll receive a confirmation email once the status is updated."
+                )
+            elif success:
                 dispatcher.utter_message(
                     text="✅ I've updated your license status to DELIVERED!\n\n"
                          "This indicates that your license should have been delivered. "
@@ -800,51 +850,45 @@ class ActionLicenseNotReceived(Action):
         return []
     
     @trace_stuff.trace_stuff("get_current_license_status")
-    def _get_current_license_status(self, headers: Dict[str, str]) -> str:
+    async def _get_current_license_status(self, headers: Dict[str, str]) -> str:
         """Get current license status from API."""
         try:
-            response = requests.get(
-                APIConfig.get_endpoint_url("get_license_details"),
-                headers=headers,
-                timeout=APIConfig.TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and data.get("data"):
-                    license_data = data["data"]
-                    # Check if there's a licenseStatus field in the response
-                    if license_data.get("licenseStatus"):
-                        return license_data["licenseStatus"]
-                    else:
-                        # If no specific status field, return a default
-                        return "PROCESSING"
+            license_data = await get_async_client().get_license_details(headers)
+            if license_data:
+                # Check if there's a licenseStatus field in the response
+                if license_data.license_status:
+                    return license_data.license_status
+                else:
+                    # If no specific status field, return a default
+                    return "PROCESSING"
             
             return None
             
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return None
     
     @trace_stuff.trace_stuff("update_license_status")
-    def _update_license_status(self, new_status: str, headers: Dict[str, str]) -> bool:
+    async def _update_license_status(self, new_status: str, headers: Dict[str, str]) -> bool:
         """Update license status using API."""
         try:
-            response = requests.post(
-                APIConfig.get_endpoint_url("update_license_status"),
+            if APIConfig.WRITE_BEHIND_ENABLED:
+                return await get_write_queue().submit("update_license_status", headers, params={"status": new_status})
+            
+            response = await get_async_client().post(
+                "update_license_status",
                 headers=headers,
-                params={"status": new_status},
-                timeout=APIConfig.TIMEOUT
+                params={"status": new_status}
             )
             
             if response.status_code == 200:
-                data = response.json()
-                return data.get("success", False)
+                api_response = APIResponse.from_json(response.content)
+                return api_response.success
             else:
                 logger.warning(f"API call failed with status {response.status_code}")
                 return False
                 
-        except requests.RequestException as e:
+        except APIError as e:
             logger.error(f"API call failed: {e}")
             return False
 
@@ -854,9 +898,10 @@ class ActionFallback(Action):
     def name(self) -> Text:
         return "action_fallback"
     
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    @trace_stuff.trace_action
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         dispatcher.utter_message(
             text="I'm not sure I understood that. Could you please rephrase or ask for help to see what I can assist you with?"
@@ -0,0 +1,465 @@
+"""
+HTTP Client for Driving License Management System
+This file contains the shared, connection-pooled, non-blocking client that actions
+use to call the backend.
+"""
+
+import asyncio
+import time
+import uuid
+from functools import partial
+from typing import Any, Dict, Hashable, Optional, Tuple
+import logging
+
+import httpx
+
+from api_config import APIConfig, APIError, APIResponse, LicenseRecord, json_loads
+from api_resilience import (CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, RateLimitedError,
+                            current_deadline, get_circuit_breaker, rate_limiter, retry_budget, retry_policy,
+                            without_deadline)
+from license_cache import DedupWindow, LicenseCache
+import log_stuff
+import metrics_stuff
+import trace_stuff
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class AsyncLicenseAPIClient:
+    """Non-blocking, connection-pooled HTTP client for the driving license backend."""
+
+    def __init__(self,
+                 max_connections: int = APIConfig.MAX_CONNECTIONS,
+                 max_keepalive_connections: int = APIConfig.POOL_MAXSIZE,
+                 keep_alive: bool = APIConfig.KEEP_ALIVE,
+                 keepalive_expiry: float = APIConfig.KEEP_ALIVE_EXPIRY,
+                 http2: bool = APIConfig.HTTP2_ENABLED,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[LicenseCache] = None):
+        self.loop = asyncio.get_running_loop()
+        self.cache = cache if cache is not None else (LicenseCache() if APIConfig.CACHE_ENABLED else None)
+        self.dedup = DedupWindow() if APIConfig.DEDUP_WINDOW > 0 else None
+        self._inflight: Dict[Tuple[str, Hashable], "asyncio.Task"] = {}
+        self._writes: Dict[Tuple[str, Hashable], "asyncio.Task"] = {}
+        self._probes: Dict[str, "asyncio.Task"] = {}
+        if http2 and not H2_AVAILABLE:
+            logger.warning("API_HTTP2_ENABLED is set but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        # With HTTP/2, concurrent calls share a few connections as multiplexed streams
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections if keep_alive else 0,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=APIConfig.TIMEOUT,
+            transport=transport,
+        )
+
+    async def request(self, method: str, endpoint_name: str,
+                      headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None,
+                      json: Optional[Dict[str, Any]] = None,
+                      idempotency_key: Optional[str] = None) -> httpx.Response:
+        """Send a request to a configured backend endpoint.
+
+        Reads, and updates that carry an idempotency key, are retried on
+        connection failures and 502/503/504 responses with jittered exponential
+        backoff, within the process-wide retry budget. Calls to an endpoint whose
+        circuit breaker is open fail immediately with CircuitOpenError. When rate
+        limits are configured, a call waits up to API_RATE_LIMIT_MAX_WAIT seconds
+        for the global and per-user limits and then fails with RateLimitedError;
+        retries are only sent if no wait is needed. Each attempt uses the
+        endpoint's connect/read timeouts, clipped to the running action's
+        deadline; DeadlineExceeded is raised once it runs out. Transport failures
+        are raised as APIError so callers handle a single exception type
+        regardless of the underlying HTTP library.
+
+        An update to one of APIConfig.DEDUP_ENDPOINTS that repeats the user's last
+        one within API_DEDUP_WINDOW seconds is not sent again: it gets the previous
+        response, or shares the identical update still in flight.
+        """
+        if method != "GET" and self.dedup is not None and endpoint_name in APIConfig.DEDUP_ENDPOINTS:
+            return await self._request_once(method, endpoint_name, headers, params, json, idempotency_key)
+        return await self._request(method, endpoint_name, headers, params, json, idempotency_key)
+
+    async def _request_once(self, method: str, endpoint_name: str,
+                            headers: Optional[Dict[str, str]],
+                            params: Optional[Dict[str, Any]],
+                            json: Optional[Dict[str, Any]],
+                            idempotency_key: Optional[str]) -> httpx.Response:
+        """Send an update unless an identical one was just made or is in flight."""
+        token = _cache_token(headers)
+        key = DedupWindow.make_key(endpoint_name, params, json)
+        previous = self.dedup.get(token, key)
+        if previous is not None:
+            response, age = previous
+            logger.info(f"Skipping repeated {method} {endpoint_name}: same update was made {age:.0f}s ago")
+            trace_stuff.set_span_attribute("api.deduplicated", True)
+            metrics_stuff.count_deduplicated(endpoint_name)
+            return response
+
+        flight = self._writes.get((token, key))
+        if flight is None:
+            flight = asyncio.ensure_future(without_deadline(
+                self._request(method, endpoint_name, headers, params, json, idempotency_key)))
+            self._writes[(token, key)] = flight
+            flight.add_done_callback(partial(self._end_write, token, key))
+        else:
+            trace_stuff.set_span_attribute("api.deduplicated", True)
+            metrics_stuff.count_deduplicated(endpoint_name)
+
+        # Shield the update so a cancelled caller does not abort it for the others,
+        # and bound each caller's wait by its own deadline
+        deadline = current_deadline()
+        if deadline is None:
+            return await asyncio.shield(flight)
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight), deadline.remaining())
+        except asyncio.TimeoutError as e:
+            metrics_stuff.count_timeout(endpoint_name, "deadline")
+            raise DeadlineExceeded(f"{method} {endpoint_name} exceeded the action deadline") from e
+
+    def _end_write(self, token: str, key: Hashable, flight: "asyncio.Task") -> None:
+        """Forget a finished update, remembering its outcome unless it should be retried."""
+        if self._writes.get((token, key)) is flight:
+            del self._writes[(token, key)]
+        if flight.cancelled() or flight.exception() is not None:
+            return
+        response = flight.result()
+        if response.status_code < 500 and response.status_code != 429:
+            self.dedup.set(token, key, response)
+
+    async def _request(self, method: str, endpoint_name: str,
+                       headers: Optional[Dict[str, str]],
+                       params: Optional[Dict[str, Any]],
+                       json: Optional[Dict[str, Any]],
+                       idempotency_key: Optional[str]) -> httpx.Response:
+        """Send a request with retries, circuit breaking and the action deadline."""
+        if method != "GET" and idempotency_key is None and APIConfig.RETRY_MUTATIONS:
+            idempotency_key = uuid.uuid4().hex
+        if idempotency_key is not None:
+            headers = {**(headers or {}), "Idempotency-Key": idempotency_key}
+        retryable = method == "GET" or idempotency_key is not None
+        breaker = get_circuit_breaker(endpoint_name) if APIConfig.BREAKER_ENABLED else None
+        deadline = current_deadline()
+
+        # An open circuit fails fast, without taking rate-limit tokens or waiting for them
+        if breaker is not None and not breaker.would_allow():
+            self._start_probe(endpoint_name, breaker)
+            raise CircuitOpenError(f"{method} {endpoint_name} rejected: circuit open")
+        if rate_limiter.enabled:
+            await self._wait_for_rate_limit(method, endpoint_name, headers, deadline)
+
+        retry_budget.record_request()
+        attempt = 0
+        while True:
+            if deadline is not None and deadline.expired():
+                metrics_stuff.count_timeout(endpoint_name, "deadline")
+                raise DeadlineExceeded(f"{method} {endpoint_name} skipped: action deadline exceeded")
+            if breaker is not None and not breaker.allow_request():
+                self._start_probe(endpoint_name, breaker)
+                raise CircuitOpenError(f"{method} {endpoint_name} rejected: circuit open")
+
+            error = None
+            started = time.monotonic()
+            try:
+                response = await self._send(method, endpoint_name, headers, params, json, deadline)
+            except APIError as e:
+                error = e
+            except BaseException:
+                # Cancelled mid-call: count it as failed so a half-open trial slot is not lost
+                if breaker is not None:
+                    breaker.record(time.monotonic() - started, failed=True)
+                raise
+
+            if breaker is not None:
+                breaker.record(time.monotonic() - started,
+                               failed=error is not None or response.status_code >= 500)
+                if breaker.state == CircuitBreaker.OPEN:
+                    self._start_probe(endpoint_name, breaker)
+
+            if error is not None and not isinstance(error.__cause__, httpx.TransportError):
+                raise error
+
+            if error is not None:
+                failure = str(error)
+            elif retry_policy.is_retryable_status(response.status_code):
+                failure = f"status {response.status_code}"
+            else:
+                break
+
+            if not retryable or attempt >= retry_policy.max_retries:
+                break
+            delay = retry_policy.backoff(attempt)
+            if deadline is not None and delay >= deadline.remaining():
+                break
+            # Retries never wait for the rate limit
+            if rate_limiter.enabled and rate_limiter.reserve(_cache_token(headers), 0) is None:
+                metrics_stuff.count_rate_limited(endpoint_name, "shed")
+                break
+            # Spend the budget last, once the retry is certain to be sent
+            if not retry_budget.try_acquire():
+                break
+            attempt += 1
+            logger.warning(f"Retrying {method} {endpoint_name} in {delay:.2f}s (attempt {attempt}): {failure}")
+            trace_stuff.add_span_event("api.retry", {"api.endpoint": endpoint_name, "api.attempt": attempt,
+                                                     "api.retry_reason": failure})
+            metrics_stuff.count_retry(endpoint_name)
+            await asyncio.sleep(delay)
+
+        trace_stuff.set_span_attribute("api.attempts", attempt + 1)
+        if error is not None:
+            raise error
+
+        # Any successful update makes the user's cached license details stale
+        if method != "GET" and response.is_success:
+            self._invalidate(_cache_token(headers))
+
+        return response
+
+    async def _wait_for_rate_limit(self, method: str, endpoint_name: str,
+                                   headers: Optional[Dict[str, str]],
+                                   deadline: Optional[Deadline]) -> None:
+        """Wait for the global and per-user rate limits, or raise RateLimitedError."""
+        max_wait = APIConfig.RATE_LIMIT_MAX_WAIT
+        if deadline is not None:
+            max_wait = min(max_wait, deadline.remaining())
+        wait = rate_limiter.reserve(_cache_token(headers), max_wait)
+        if wait is None:
+            metrics_stuff.count_rate_limited(endpoint_name, "shed")
+            raise RateLimitedError(f"{method} {endpoint_name} rejected: rate limit exceeded")
+        if wait > 0:
+            metrics_stuff.count_rate_limited(endpoint_name, "delayed")
+            trace_stuff.add_span_event("api.rate_limited", {"api.endpoint": endpoint_name, "api.wait": wait})
+            await asyncio.sleep(wait)
+
+    async def _send(self, method: str, endpoint_name: str,
+                    headers: Optional[Dict[str, str]],
+                    params: Optional[Dict[str, Any]],
+                    json: Optional[Dict[str, Any]],
+                    deadline: Optional[Deadline]) -> httpx.Response:
+        """Send a single request attempt within the endpoint timeouts and the deadline."""
+        connect_timeout, read_timeout = APIConfig.get_endpoint_timeouts(endpoint_name)
+        total_timeout = APIConfig.TIMEOUT
+        if deadline is not None:
+            remaining = deadline.remaining()
+            connect_timeout = min(connect_timeout, remaining)
+            read_timeout = min(read_timeout, remaining)
+            total_timeout = min(total_timeout, remaining)
+
+        send = self.client.request(
+            method,
+            APIConfig.get_endpoint_url(endpoint_name),
+            headers=headers,
+            params=params,
+            json=json,
+            timeout=httpx.Timeout(total_timeout, connect=connect_timeout, read=read_timeout)
+        )
+        started = metrics_stuff.backend_call_started(endpoint_name)
+        status = "error"
+        try:
+            # Bound the whole exchange, not just each socket operation
+            response = await asyncio.wait_for(send, total_timeout)
+            status = response.status_code
+            trace_stuff.set_span_attribute("http.flavor", response.http_version)
+            return response
+        except asyncio.TimeoutError as e:
+            status = "timeout"
+            metrics_stuff.count_timeout(endpoint_name, "deadline")
+            raise DeadlineExceeded(f"{method} {endpoint_name} timed out after {total_timeout:.2f}s") from e
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.TimeoutException):
+                status = "timeout"
+                metrics_stuff.count_timeout(endpoint_name, type(e).__name__.replace("Timeout", "").lower())
+            raise APIError(f"{method} {endpoint_name} failed: {e}") from e
+        finally:
+            metrics_stuff.backend_call_finished(endpoint_name, status, started)
+
+    def _start_probe(self, endpoint_name: str, breaker: CircuitBreaker) -> None:
+        """Start probing the backend in the background while the circuit is open."""
+        probe = self._probes.get(endpoint_name)
+        if probe is None or probe.done():
+            self._probes[endpoint_name] = asyncio.ensure_future(self._probe(breaker))
+
+    async def _probe(self, breaker: CircuitBreaker) -> None:
+        """Send trial requests to the backend's health endpoint until the circuit closes again.
+
+        Only a 2xx answer counts as a successful trial.
+        """
+        while breaker.state != CircuitBreaker.CLOSED:
+            await asyncio.sleep(max(breaker.retry_after(), 0.5))
+            if not breaker.allow_request():
+                continue
+
+            started = time.monotonic()
+            try:
+                response = await self.client.get(APIConfig.BASE_URL + APIConfig.HEALTH_PATH,
+                                                 timeout=breaker.slow_call_duration)
+                failed = not response.is_success
+            except httpx.HTTPError:
+                failed = True
+            breaker.record(time.monotonic() - started, failed)
+
+    async def get(self, endpoint_name: str, **kwargs) -> httpx.Response:
+        """Send a GET request to a configured backend endpoint."""
+        return await self.request("GET", endpoint_name, **kwargs)
+
+    async def post(self, endpoint_name: str, **kwargs) -> httpx.Response:
+        """Send a POST request to a configured backend endpoint."""
+        return await self.request("POST", endpoint_name, **kwargs)
+
+    async def get_license_details(self, headers: Dict[str, str],
+                                  params: Optional[Dict[str, Any]] = None) -> Optional[LicenseRecord]:
+        """Get the license record for the user identified by the headers.
+
+        Returns the record decoded from the response's data field, or None if the backend
+        did not return one. Records are served from the cache while fresh, and
+        concurrent reads for the same token and parameters share one request.
+        A record that went stale less than API_CACHE_STALE_WHILE_REVALIDATE seconds
+        ago is returned immediately and refreshed in the background. If the backend
+        fails, a record that went stale less than API_CACHE_STALE_IF_ERROR seconds
+        ago is returned instead of raising (see LicenseRecord.is_possibly_outdated).
+        """
+        token = _cache_token(headers)
+        entry = self.cache.get_entry(token, params) if self.cache is not None else None
+        if entry is not None:
+            license_data, age = entry
+            if age < self.cache.ttl:
+                metrics_stuff.count_cache_lookup("hit")
+                return license_data
+            if age < self.cache.ttl + APIConfig.CACHE_STALE_WHILE_REVALIDATE:
+                metrics_stuff.count_cache_lookup("stale")
+                self._join_flight(token, headers, params)
+                return license_data
+
+        key = (token, LicenseCache.make_key(params))
+        metrics_stuff.count_cache_lookup("miss" if key not in self._inflight else "coalesced")
+        flight = self._join_flight(token, headers, params)
+
+        # Shield the shared request so one cancelled caller does not fail the others
+        deadline = current_deadline()
+        try:
+            if deadline is None:
+                return await asyncio.shield(flight)
+            try:
+                return await asyncio.wait_for(asyncio.shield(flight), deadline.remaining())
+            except asyncio.TimeoutError as e:
+                metrics_stuff.count_timeout("get_license_details", "deadline")
+                raise DeadlineExceeded("Reading license details exceeded the action deadline") from e
+        except APIError as e:
+            if entry is None or entry[1] >= self.cache.ttl + APIConfig.CACHE_STALE_IF_ERROR:
+                raise
+            logger.warning(f"Serving stale license details ({entry[1]:.0f}s old): {e}")
+            metrics_stuff.count_cache_lookup("stale_if_error")
+            return entry[0]
+
+    def prefetch_license_details(self, headers: Dict[str, str],
+                                 params: Optional[Dict[str, Any]] = None) -> None:
+        """Start reading the user's license record into the cache without waiting for it.
+
+        Does nothing if caching is off or a fresh record is already cached. Failures
+        are only logged; the next get_license_details call fetches the record again.
+        """
+        if self.cache is None:
+            return
+        token = _cache_token(headers)
+        entry = self.cache.get_entry(token, params)
+        if entry is not None and entry[1] < self.cache.ttl:
+            return
+        flight = self._join_flight(token, headers, params)
+        flight.add_done_callback(_log_prefetch_failure)
+
+    def _join_flight(self, token: str, headers: Dict[str, str],
+                     params: Optional[Dict[str, Any]]) -> "asyncio.Future":
+        """Get the in-flight read for the token and parameters, starting one if needed."""
+        key = (token, LicenseCache.make_key(params))
+        flight = self._inflight.get(key)
+        if flight is None:
+            # The read is shared, so it runs outside any one caller's deadline
+            flight = asyncio.ensure_future(without_deadline(self._fetch_license_details(key, headers, params)))
+            self._inflight[key] = flight
+            flight.add_done_callback(partial(self._end_flight, key))
+        return flight
+
+    async def _fetch_license_details(self, key: Tuple[str, Hashable], headers: Dict[str, str],
+                                     params: Optional[Dict[str, Any]]) -> Optional[LicenseRecord]:
+        """Fetch the license record from the backend and cache it."""
+        response = await self.get("get_license_details", headers=headers, params=params)
+        if response.status_code >= 500:
+            raise APIError(f"License details request failed with status {response.status_code}",
+                           response.status_code)
+        if response.status_code != 200:
+            logger.warning(f"API call failed with status {response.status_code}")
+            return None
+
+        try:
+            payload = json_loads(response.content)
+        except ValueError as e:
+            raise APIError("Invalid JSON in license details response", response.status_code) from e
+        log_stuff.debug_payload(logger, "license_details_response", payload)
+
+        api_response = APIResponse.from_dict(payload)
+        if not (api_response.success and api_response.data):
+            return None
+
+        license_data = LicenseRecord.from_dict(api_response.data)
+
+        # Skip caching if an update invalidated this request while it was in flight
+        if self.cache is not None and self._inflight.get(key) is asyncio.current_task():
+            self.cache.set(key[0], params, license_data)
+        return license_data
+
+    def _end_flight(self, key: Tuple[str, Hashable], flight: "asyncio.Task") -> None:
+        """Forget a finished shared request."""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if not flight.cancelled():
+            # Mark the exception as retrieved in case every caller went away
+            flight.exception()
+
+    def invalidate(self, headers: Optional[Dict[str, str]]) -> None:
+        """Drop cached and in-flight license reads, and recorded updates, for the user identified by the headers."""
+        self._invalidate(_cache_token(headers))
+
+    def _invalidate(self, token: str) -> None:
+        """Drop cached and in-flight license reads, and recorded updates, for a token."""
+        if self.cache is not None:
+            self.cache.invalidate(token)
+        if self.dedup is not None:
+            self.dedup.invalidate(token)
+        for key in [key for key in self._inflight if key[0] == token]:
+            del self._inflight[key]
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        await self.client.aclose()
+
+def _cache_token(headers: Optional[Dict[str, str]]) -> str:
+    """Get the cache scope for a request: the Authorization header it carries."""
+    return (headers or {}).get("Authorization", "")
+
+def _log_prefetch_failure(flight: "asyncio.Task") -> None:
+    if not flight.cancelled() and flight.exception() is not None:
+        logger.warning(f"License details prefetch failed: {flight.exception()}")
+
+_async_client: Optional[AsyncLicenseAPIClient] = None
+
+def get_async_client() -> AsyncLicenseAPIClient:
+    """Get the async API client for the running event loop, creating it on first use.
+
+    The connection pool is bound to the event loop it was created on, so a new
+    client is built if the action server runs on a different loop.
+    """
+    global _async_client
+    if _async_client is None or _async_client.loop is not asyncio.get_running_loop():
+        _async_client = AsyncLicenseAPIClient()
+        logger.info(f"Async API client initialized for {APIConfig.BASE_URL}")
+    return _async_client
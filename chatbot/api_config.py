@@ -4,11 +4,31 @@ This file contains all API-related configuration and utility functions.
 """
 
 import os
-from typing import Dict, Optional
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
 import logging
 
+# Decode JSON with orjson when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+def _endpoint_timeouts(endpoints: Dict[str, str], connect: float, read: float,
+                       read_defaults: Dict[str, float]) -> Dict[str, Tuple[float, float]]:
+    """Read each endpoint's (connect, read) timeouts from API_CONNECT_TIMEOUT_<NAME>
+    and API_READ_TIMEOUT_<NAME>, e.g. API_READ_TIMEOUT_CHANGE_ADDRESS."""
+    return {
+        name: (float(os.getenv(f"API_CONNECT_TIMEOUT_{name.upper()}", connect)),
+               float(os.getenv(f"API_READ_TIMEOUT_{name.upper()}", read_defaults.get(name, read))))
+        for name in endpoints
+    }
+
 class APIConfig:
     """Configuration class for API settings."""
     
@@ -31,9 +51,105 @@ class APIConfig:
     # Request timeout (in seconds)
     TIMEOUT = int(os.getenv("API_TIMEOUT", "30"))
     
-    # Retry configuration
+    # Default connect/read timeouts (in seconds)
+    CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "2"))
+    READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "8"))
+    
+    # Per-endpoint (connect, read) timeouts (in seconds); license lookups are
+    # quick reads and default to a shorter read timeout
+    ENDPOINT_TIMEOUTS = _endpoint_timeouts(ENDPOINTS, CONNECT_TIMEOUT, READ_TIMEOUT, {
+        "get_license_details": float(os.getenv("API_READ_TIMEOUT_LICENSE_DETAILS", "4")),
+    })
+    
+    # Time budget (in seconds) shared by all backend calls of one action run.
+    # Keep it below the Rasa server's action endpoint timeout.
+    ACTION_DEADLINE = float(os.getenv("API_ACTION_DEADLINE", "10"))
+    
+    # Retry configuration (exponential backoff with full jitter)
     MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
-    RETRY_DELAY = int(os.getenv("API_RETRY_DELAY", "1"))
+    RETRY_DELAY = float(os.getenv("API_RETRY_DELAY", "1"))
+    RETRY_MAX_DELAY = float(os.getenv("API_RETRY_MAX_DELAY", "4"))
+    # Retries may not exceed this fraction of requests, process-wide
+    RETRY_BUDGET_RATIO = float(os.getenv("API_RETRY_BUDGET_RATIO", "0.1"))
+    RETRY_BUDGET_MAX_TOKENS = float(os.getenv("API_RETRY_BUDGET_MAX_TOKENS", "10"))
+    # Retry updates too, sending an Idempotency-Key header with each one
+    RETRY_MUTATIONS = os.getenv("API_RETRY_MUTATIONS", "false").lower() == "true"
+    
+    # Rate limits on backend calls in requests per second (0 = off): per process and per user token.
+    # Calls wait up to RATE_LIMIT_MAX_WAIT seconds for a token, then fail with the action's fallback message.
+    RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "0"))
+    RATE_LIMIT_BURST = float(os.getenv("API_RATE_LIMIT_BURST", "50"))
+    USER_RATE_LIMIT = float(os.getenv("API_USER_RATE_LIMIT", "0"))
+    USER_RATE_LIMIT_BURST = float(os.getenv("API_USER_RATE_LIMIT_BURST", "10"))
+    # Per-user buckets are kept for this many most recently seen user tokens
+    USER_RATE_LIMIT_MAX_USERS = int(os.getenv("API_USER_RATE_LIMIT_MAX_USERS", "1024"))
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("API_RATE_LIMIT_MAX_WAIT", "2"))
+    
+    # Bulkheads: separate (max concurrent runs, max waiting runs) for read and update actions
+    BULKHEADS_ENABLED = os.getenv("API_BULKHEADS_ENABLED", "true").lower() == "true"
+    BULKHEADS = {
+        "reads": (int(os.getenv("API_BULKHEAD_READ_CONCURRENCY", "100")),
+                  int(os.getenv("API_BULKHEAD_READ_QUEUE", "100"))),
+        "updates": (int(os.getenv("API_BULKHEAD_UPDATE_CONCURRENCY", "20")),
+                    int(os.getenv("API_BULKHEAD_UPDATE_QUEUE", "40"))),
+    }
+    # Seconds an action may wait for a bulkhead slot (also bounded by the action deadline)
+    BULKHEAD_MAX_WAIT = float(os.getenv("API_BULKHEAD_MAX_WAIT", "2"))
+    
+    # Circuit breaker configuration (per endpoint)
+    BREAKER_ENABLED = os.getenv("API_BREAKER_ENABLED", "true").lower() == "true"
+    BREAKER_WINDOW_SIZE = int(os.getenv("API_BREAKER_WINDOW_SIZE", "20"))
+    BREAKER_MINIMUM_CALLS = int(os.getenv("API_BREAKER_MINIMUM_CALLS", "10"))
+    BREAKER_FAILURE_RATE = float(os.getenv("API_BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_RATE = float(os.getenv("API_BREAKER_SLOW_CALL_RATE", "0.5"))
+    BREAKER_SLOW_CALL_DURATION = float(os.getenv("API_BREAKER_SLOW_CALL_DURATION", "5"))
+    BREAKER_OPEN_DURATION = float(os.getenv("API_BREAKER_OPEN_DURATION", "15"))
+    BREAKER_HALF_OPEN_CALLS = int(os.getenv("API_BREAKER_HALF_OPEN_CALLS", "3"))
+    
+    # Connection pool configuration (shared by all actions)
+    POOL_MAXSIZE = int(os.getenv("API_POOL_MAXSIZE", "20"))
+    KEEP_ALIVE = os.getenv("API_KEEP_ALIVE", "true").lower() == "true"
+    KEEP_ALIVE_EXPIRY = float(os.getenv("API_KEEP_ALIVE_EXPIRY", "30"))
+    
+    # Maximum concurrent backend requests per action-server process (async client)
+    MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "200"))
+    
+    # Use HTTP/2 for the async client when the backend offers it via TLS (needs h2)
+    HTTP2_ENABLED = os.getenv("API_HTTP2_ENABLED", "false").lower() == "true"
+    
+    # License details cache (per user token, invalidated on successful updates)
+    CACHE_ENABLED = os.getenv("API_CACHE_ENABLED", "true").lower() == "true"
+    CACHE_TTL = float(os.getenv("API_CACHE_TTL", "30"))
+    CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+    # Seconds past the TTL during which a record is served while it is refreshed in the background
+    CACHE_STALE_WHILE_REVALIDATE = float(os.getenv("API_CACHE_STALE_WHILE_REVALIDATE", "30"))
+    # Seconds past the TTL during which a record is served if the backend fails
+    CACHE_STALE_IF_ERROR = float(os.getenv("API_CACHE_STALE_IF_ERROR", "600"))
+    
+    # Read the user's license record into the cache when a session starts with a token
+    PREFETCH_ON_SESSION_START = os.getenv("API_PREFETCH_ON_SESSION_START", "true").lower() == "true"
+    
+    # Seconds during which a repeated identical update returns the previous outcome (0 = off)
+    DEDUP_WINDOW = float(os.getenv("API_DEDUP_WINDOW", "60"))
+    DEDUP_ENDPOINTS = ("update_license_status", "change_address")
+    
+    # Backend health monitor and readiness (GET /ready on the action server)
+    HEALTH_PATH = os.getenv("API_HEALTH_PATH", "/actuator/health")
+    HEALTH_INTERVAL = float(os.getenv("API_HEALTH_INTERVAL", "10"))
+    HEALTH_TIMEOUT = float(os.getenv("API_HEALTH_TIMEOUT", "2"))
+    HEALTH_FAILURE_THRESHOLD = int(os.getenv("API_HEALTH_FAILURE_THRESHOLD", "3"))
+    WARMUP_CONNECTIONS = int(os.getenv("API_WARMUP_CONNECTIONS", "4"))
+    READINESS_REQUIRE_BACKEND = os.getenv("API_READINESS_REQUIRE_BACKEND", "false").lower() == "true"
+    
+    # Write-behind queue for mutating actions (opt-in)
+    WRITE_BEHIND_ENABLED = os.getenv("API_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_QUEUE_PATH = os.getenv("API_WRITE_QUEUE_PATH", "write_queue.db")
+    WRITE_QUEUE_MAX_ATTEMPTS = int(os.getenv("API_WRITE_QUEUE_MAX_ATTEMPTS", "20"))  # 0 = unlimited
+    WRITE_QUEUE_MAX_DELAY = float(os.getenv("API_WRITE_QUEUE_MAX_DELAY", "300"))
+    WRITE_QUEUE_LEASE = float(os.getenv("API_WRITE_QUEUE_LEASE", "120"))
+    WRITE_QUEUE_POLL_INTERVAL = float(os.getenv("API_WRITE_QUEUE_POLL_INTERVAL", "5"))
+    WRITE_QUEUE_BATCH_SIZE = int(os.getenv("API_WRITE_QUEUE_BATCH_SIZE", "50"))
+    WRITE_QUEUE_FAILED_RETENTION = float(os.getenv("API_WRITE_QUEUE_FAILED_RETENTION", "604800"))  # seconds
     
     @classmethod
     def get_endpoint_url(cls, endpoint_name: str) -> str:
@@ -43,6 +159,11 @@ class APIConfig:
         
         return f"{cls.BASE_URL}{cls.ENDPOINTS[endpoint_name]}"
     
+    @classmethod
+    def get_endpoint_timeouts(cls, endpoint_name: str) -> Tuple[float, float]:
+        """Get the (connect, read) timeouts for a specific endpoint."""
+        return cls.ENDPOINT_TIMEOUTS.get(endpoint_name, (cls.CONNECT_TIMEOUT, cls.READ_TIMEOUT))
+    
     @classmethod
     def get_auth_headers(cls) -> Dict[str, str]:
         """Get authentication headers."""
@@ -56,8 +177,8 @@ class APIConfig:
         """Validate API configuration."""
         try:
             # Check if base URL is accessible
-            import requests
-            response = requests.get(cls.BASE_URL, timeout=5)
+            import httpx
+            response = httpx.get(cls.BASE_URL, timeout=5)
             logger.info(f"API base URL is accessible: {cls.BASE_URL}")
             return True
         except Exception as e:
@@ -67,7 +188,9 @@ class APIConfig:
 # API Response Models
 class APIResponse:
     """Standard API response structure."""
-    
+
+    __slots__ = ("success", "message", "data")
+
     def __init__(self, success: bool, message: str, data: Optional[Dict] = None):
         self.success = success
         self.message = message
@@ -81,6 +204,17 @@ class APIResponse:
             message=response_dict.get("message", ""),
             data=response_dict.get("data", {})
         )
+
+    @classmethod
+    def from_json(cls, body: bytes) -> 'APIResponse':
+        """Create APIResponse from a raw response body; raises APIError if it is not a JSON object."""
+        try:
+            payload = json_loads(body)
+        except ValueError as e:
+            raise APIError("Invalid JSON in API response") from e
+        if not isinstance(payload, dict):
+            raise APIError("Unexpected API response format")
+        return cls.from_dict(payload)
     
     def is_success(self) -> bool:
         """Check if response indicates success."""
@@ -90,6 +224,67 @@ class APIResponse:
         """Get data value with default fallback."""
         return self.data.get(key, default)
 
+class LicenseRecord:
+    """License details returned by getLicenseDetails, with dates parsed once.
+
+    Records are shared through the license cache, so treat them as read-only.
+    """
+
+    __slots__ = ("id", "user_id", "license_number", "first_name", "last_name", "vehicle_type",
+                 "vehicle_make", "address", "license_status", "issue_date", "expiration_date", "fetched_at")
+
+    def __init__(self, id: Optional[int], user_id: Optional[int], license_number: str,
+                 first_name: str, last_name: str, vehicle_type: str, vehicle_make: str,
+                 address: str, license_status: Optional[str],
+                 issue_date: Optional[datetime], expiration_date: Optional[datetime],
+                 fetched_at: Optional[float] = None):
+        self.id = id
+        self.user_id = user_id
+        self.license_number = license_number
+        self.first_name = first_name
+        self.last_name = last_name
+        self.vehicle_type = vehicle_type
+        self.vehicle_make = vehicle_make
+        self.address = address
+        self.license_status = license_status
+        self.issue_date = issue_date
+        self.expiration_date = expiration_date
+        # When the record was read from the backend (epoch seconds)
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LicenseRecord':
+        """Create LicenseRecord from the data field of an API response."""
+        return cls(
+            id=data.get("id"),
+            user_id=data.get("userId"),
+            license_number=data.get("licenseNumber", ""),
+            first_name=data.get("firstName", ""),
+            last_name=data.get("lastName", ""),
+            vehicle_type=data.get("vehicleType", ""),
+            vehicle_make=data.get("vehicleMake", ""),
+            address=data.get("address", ""),
+            license_status=data.get("licenseStatus"),
+            issue_date=parse_api_datetime(data.get("issueDate")),
+            expiration_date=parse_api_datetime(data.get("expirationDate")),
+        )
+
+    @property
+    def full_name(self) -> str:
+        """Get the holder's full name."""
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def is_possibly_outdated(self) -> bool:
+        """Check if the record is older than the cache would normally serve.
+
+        That only happens when the backend failed and a stale copy was used instead.
+        """
+        return time.time() - self.fetched_at > APIConfig.CACHE_TTL + APIConfig.CACHE_STALE_WHILE_REVALIDATE
+
+    def fetched_at_display(self) -> str:
+        """Format the time the record was read from the backend, for user messages."""
+        return datetime.fromtimestamp(self.fetched_at, timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
 # Error handling
 class APIError(Exception):
     """Custom exception for API-related errors."""
@@ -131,6 +326,20 @@ def parse_api_date(date_string: str) -> Optional[str]:
         logger.error(f"Date parsing failed: {e}")
         return None
 
+def parse_api_datetime(date_string: Optional[str]) -> Optional[datetime]:
+    """Parse an API timestamp (ISO 8601) into a datetime, or None if missing or invalid."""
+    if not date_string:
+        return None
+    try:
+        return datetime.fromisoformat(date_string.replace('Z', '+00:00'))
+    except ValueError:
+        logger.error(f"Invalid date format: {date_string}")
+        return None
+
+def format_api_date(value: Optional[datetime]) -> str:
+    """Format a parsed API date for display (YYYY-MM-DD); empty when missing."""
+    return value.strftime("%Y-%m-%d") if value else ""
+
 def mask_sensitive_data(data: str, mask_char: str = "*") -> str:
     """Mask sensitive data for display."""
     if not data or len(data) <= 4:
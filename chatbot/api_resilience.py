@@ -0,0 +1,399 @@
+"""
+API Resilience for Driving License Management System
+This file contains the policies that protect backend calls from transient failures.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Optional
+import logging
+
+from api_config import APIConfig, APIError
+import metrics_stuff
+
+logger = logging.getLogger(__name__)
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for retryable backend calls."""
+
+    RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+    def __init__(self, max_retries: int = APIConfig.MAX_RETRIES,
+                 base_delay: float = APIConfig.RETRY_DELAY,
+                 max_delay: float = APIConfig.RETRY_MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Get the delay before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        """Check if a response status indicates a transient failure."""
+        return status_code in self.RETRYABLE_STATUS_CODES
+
+class RetryBudget:
+    """Process-wide cap on retries as a fraction of regular traffic.
+
+    Every request deposits `ratio` tokens and every retry spends one, so retries
+    stay below `ratio` of all requests. `max_tokens` bounds the burst of retries
+    allowed after a quiet period.
+    """
+
+    def __init__(self, ratio: float = APIConfig.RETRY_BUDGET_RATIO,
+                 max_tokens: float = APIConfig.RETRY_BUDGET_MAX_TOKENS):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Credit the budget for one regular request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend budget for one retry; returns False if the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class CircuitOpenError(APIError):
+    """Raised when a call is rejected because the endpoint's circuit is open."""
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker over a sliding window of recent calls.
+
+    The circuit opens when the failure rate or the slow-call rate of the last
+    `window_size` calls reaches its threshold. While open, calls are rejected
+    immediately. After `open_duration` seconds it lets `half_open_calls` trial
+    calls through: if all succeed quickly it closes again, otherwise it reopens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str,
+                 window_size: int = APIConfig.BREAKER_WINDOW_SIZE,
+                 minimum_calls: int = APIConfig.BREAKER_MINIMUM_CALLS,
+                 failure_rate_threshold: float = APIConfig.BREAKER_FAILURE_RATE,
+                 slow_call_rate_threshold: float = APIConfig.BREAKER_SLOW_CALL_RATE,
+                 slow_call_duration: float = APIConfig.BREAKER_SLOW_CALL_DURATION,
+                 open_duration: float = APIConfig.BREAKER_OPEN_DURATION,
+                 half_open_calls: int = APIConfig.BREAKER_HALF_OPEN_CALLS):
+        self.name = name
+        self.minimum_calls = minimum_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+
+        self._state = self.CLOSED
+        self._outcomes = deque(maxlen=window_size)  # (failed, slow) per call
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Get the current state, moving from open to half-open once the wait is over."""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def retry_after(self) -> float:
+        """Get the seconds left until an open circuit admits trial calls."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_duration - time.monotonic())
+
+    def would_allow(self) -> bool:
+        """Check whether allow_request would let a call through, without reserving a trial slot."""
+        with self._lock:
+            self._refresh_state()
+            return self._state == self.CLOSED or (
+                self._state == self.HALF_OPEN and self._trial_calls < self.half_open_calls)
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go through, reserving a trial slot when half-open."""
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_calls:
+                self._trial_calls += 1
+                return True
+            return False
+
+    def record(self, duration: float, failed: bool) -> None:
+        """Record the outcome of a call that was allowed through."""
+        slow = duration >= self.slow_call_duration
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._trial_successes += 1
+                    if self._trial_successes >= self.half_open_calls:
+                        self._close()
+                return
+
+            if self._state != self.CLOSED:
+                return
+
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.minimum_calls:
+                return
+
+            failure_rate = sum(1 for failed, _ in self._outcomes if failed) / len(self._outcomes)
+            slow_call_rate = sum(1 for _, slow in self._outcomes if slow) / len(self._outcomes)
+            if failure_rate >= self.failure_rate_threshold or slow_call_rate >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _refresh_state(self) -> None:
+        if self._state == self.OPEN and time.monotonic() >= self._opened_at + self.open_duration:
+            self._state = self.HALF_OPEN
+            self._trial_calls = 0
+            self._trial_successes = 0
+
+    def _open(self) -> None:
+        if self._state != self.OPEN:
+            logger.warning(f"Circuit breaker for {self.name} opened")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        logger.info(f"Circuit breaker for {self.name} closed")
+        self._state = self.CLOSED
+        self._outcomes.clear()
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(endpoint_name: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for an endpoint."""
+    breaker = _circuit_breakers.get(endpoint_name)
+    if breaker is None:
+        with _circuit_breakers_lock:
+            breaker = _circuit_breakers.setdefault(endpoint_name, CircuitBreaker(endpoint_name))
+    return breaker
+
+class RateLimitedError(APIError):
+    """Raised when a call is shed because the backend rate limit would make it wait too long."""
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst`.
+
+    Tokens are reserved up front, so the count can go negative: each caller
+    waits for its own token and waiting callers are served in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """Get the seconds until the next token is available."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def take(self) -> None:
+        """Reserve the next token."""
+        self._tokens -= 1
+
+class RateLimiter:
+    """Process-wide and per-user token buckets in front of the backend.
+
+    A call reserves a token from the global bucket and from the bucket of its
+    bearer token, and then waits until both are due. If that would take longer
+    than the caller may wait, nothing is reserved and the call is shed.
+    Per-user buckets are kept for the `max_users` most recent tokens.
+    """
+
+    def __init__(self, rate: float = APIConfig.RATE_LIMIT,
+                 burst: float = APIConfig.RATE_LIMIT_BURST,
+                 user_rate: float = APIConfig.USER_RATE_LIMIT,
+                 user_burst: float = APIConfig.USER_RATE_LIMIT_BURST,
+                 max_users: int = APIConfig.USER_RATE_LIMIT_MAX_USERS):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self._global = TokenBucket(rate, burst) if rate > 0 else None
+        self._users: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Check whether any limit is configured."""
+        return self._global is not None or self.user_rate > 0
+
+    def reserve(self, token: str, max_wait: float) -> Optional[float]:
+        """Reserve a call for the token; returns the seconds to wait, or None to shed it."""
+        with self._lock:
+            buckets = [self._global] if self._global is not None else []
+            if self.user_rate > 0:
+                bucket = self._users.get(token)
+                if bucket is None:
+                    bucket = self._users[token] = TokenBucket(self.user_rate, self.user_burst)
+                    while len(self._users) > self.max_users:
+                        self._users.popitem(last=False)
+                self._users.move_to_end(token)
+                buckets.append(bucket)
+
+            now = time.monotonic()
+            wait = max((bucket.delay(now) for bucket in buckets), default=0.0)
+            if wait > max_wait:
+                return None
+            for bucket in buckets:
+                bucket.take()
+            return wait
+
+# Shared by every client in the process
+retry_policy = RetryPolicy()
+retry_budget = RetryBudget()
+rate_limiter = RateLimiter()
+
+class DeadlineExceeded(APIError):
+    """Raised when an action has used up its time budget for backend calls."""
+
+class Deadline:
+    """Time budget shared by every backend call made during one action run."""
+
+    def __init__(self, budget: float = APIConfig.ACTION_DEADLINE):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Get the seconds left in the budget."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Check whether the budget is used up."""
+        return time.monotonic() >= self.expires_at
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("api_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline of the action currently running, if any."""
+    return _current_deadline.get()
+
+async def without_deadline(awaitable):
+    """Await outside the running action's deadline.
+
+    Wrap the coroutine of a task that is shared by several actions or outlives
+    the one that started it; each waiter then bounds its own wait instead.
+    """
+    # Tasks run in a copy of the context, so this does not affect the caller
+    _current_deadline.set(None)
+    return await awaitable
+
+def with_deadline(budget: Optional[float] = None):
+    """Decorator giving each run of an async action a fresh backend time budget.
+
+    Backend calls made while the action runs draw from the budget, so the action
+    answers with its fallback message instead of outliving the Rasa server's
+    action timeout.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = _current_deadline.set(Deadline(budget if budget is not None else APIConfig.ACTION_DEADLINE))
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current_deadline.reset(token)
+        return wrapper
+    return decorator
+
+class Bulkhead:
+    """Caps how many actions of one class run at once, with a bounded wait queue.
+
+    Reads and updates get separate bulkheads, so a backlog of slow updates
+    cannot take the concurrency (and backend connections) that quick reads need.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._admitted = 0  # running plus waiting
+
+    async def acquire(self, timeout: Optional[float]) -> bool:
+        """Take a slot, waiting at most `timeout` seconds; returns False if rejected."""
+        if self._admitted >= self.max_concurrent + self.max_queue:
+            return False
+
+        self._admitted += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._admitted -= 1
+            return False
+        except BaseException:
+            self._admitted -= 1
+            raise
+
+    def release(self) -> None:
+        """Give back a slot taken with acquire."""
+        self._admitted -= 1
+        self._semaphore.release()
+
+_bulkheads: Dict[str, Bulkhead] = {}
+
+def get_bulkhead(name: str) -> Bulkhead:
+    """Get the process-wide bulkhead configured in APIConfig.BULKHEADS."""
+    bulkhead = _bulkheads.get(name)
+    if bulkhead is None:
+        max_concurrent, max_queue = APIConfig.BULKHEADS[name]
+        bulkhead = _bulkheads[name] = Bulkhead(name, max_concurrent, max_queue)
+    return bulkhead
+
+BUSY_MESSAGE = "⏳ We're handling a lot of requests right now. Please try again in a moment."
+
+def with_bulkhead(name: str):
+    """Decorator running an async action inside the named bulkhead.
+
+    Apply it below @with_deadline() so the wait for a slot is bounded by the
+    action's deadline as well as API_BULKHEAD_MAX_WAIT. When no slot frees up in
+    time, or the queue is full, the action answers with BUSY_MESSAGE.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, dispatcher, tracker, domain):
+            if not APIConfig.BULKHEADS_ENABLED:
+                return await func(self, dispatcher, tracker, domain)
+
+            bulkhead = get_bulkhead(name)
+            deadline = current_deadline()
+            timeout = APIConfig.BULKHEAD_MAX_WAIT
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+            if not await bulkhead.acquire(timeout):
+                logger.warning(f"Bulkhead {name} is full, rejecting {self.name()}")
+                metrics_stuff.count_bulkhead_rejection(name)
+                dispatcher.utter_message(text=BUSY_MESSAGE)
+                return []
+            try:
+                return await func(self, dispatcher, tracker, domain)
+            finally:
+                bulkhead.release()
+        return wrapper
+    return decorator
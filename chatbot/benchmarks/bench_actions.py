@@ -0,0 +1,45 @@
+"""
+Benchmarks for the full run() of each action against the in-process fake backend.
+
+Not benchmarked, because run() raises before it does any work:
+- ActionViewLicenseInfo calls get_user_license_number, which is not defined.
+- ActionRequestDuplicate, ActionAddVehicleType, ActionRemoveVehicleType and
+  ActionChangeContact call endpoints missing from APIConfig.ENDPOINTS (the
+  backend has no such routes), so the client raises ValueError.
+"""
+
+import pytest
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions
+from conftest import SAMPLE_LICENSE, make_tracker
+
+ACTION_CASES = [
+    (actions.ActionValidateLicense, {"license_number": SAMPLE_LICENSE["licenseNumber"]}),
+    (actions.ActionAuthenticateUser, {"license_number": SAMPLE_LICENSE["licenseNumber"], "full_name": "Alex Rogers"}),
+    (actions.ActionCheckLicenseStatus, {}),
+    (actions.ActionRenewLicense, {}),
+    (actions.ActionChangeAddress, {"new_address": "742 Evergreen Terrace, Springfield, IL"}),
+    (actions.ActionUpdateLicenseStatus, {"new_status": "DISPATCHED"}),
+    (actions.ActionLicenseNotReceived, {}),
+    (actions.ActionSessionStart, {}),
+    (actions.ActionResetAuthentication, {}),
+    (actions.ActionFallback, {}),
+]
+
+# Actions that reply with no message
+SILENT_ACTIONS = (actions.ActionSessionStart, actions.ActionResetAuthentication)
+
+@pytest.mark.parametrize("action_class,slots", ACTION_CASES, ids=[case[0].__name__ for case in ACTION_CASES])
+def bench_action_run(benchmark, event_loop, fake_client, action_class, slots):
+    action = action_class()
+    tracker = make_tracker(slots)
+
+    def run_action():
+        dispatcher = CollectingDispatcher()
+        event_loop.run_until_complete(action.run(dispatcher, tracker, {}))
+        return dispatcher.messages
+
+    messages = benchmark(run_action)
+    if action_class not in SILENT_ACTIONS:
+        assert messages and "❌" not in messages[0]["text"]
@@ -0,0 +1,33 @@
+"""
+Benchmarks for the api_config helpers and request-building hot paths.
+"""
+
+from api_config import APIResponse, LicenseRecord, format_license_number, mask_sensitive_data, parse_api_date
+from actions.actions import ActionValidateLicense, build_auth_headers_from_tracker
+from conftest import RESPONSE_BODY, make_tracker
+
+def bench_format_license_number(benchmark):
+    assert benchmark(format_license_number, "DL-102-175578760328916906") == "DL-102-175578760328916906"
+
+def bench_mask_sensitive_data(benchmark):
+    assert benchmark(mask_sensitive_data, "DL-102-175578760328916906").startswith("DL")
+
+def bench_parse_api_date_iso(benchmark):
+    assert benchmark(parse_api_date, "2025-08-21T14:46:43.290+00:00") == "2025-08-21"
+
+def bench_parse_api_date_plain(benchmark):
+    assert benchmark(parse_api_date, "2025-08-21") == "2025-08-21"
+
+def bench_is_valid_format(benchmark):
+    action = ActionValidateLicense()
+    assert benchmark(action._is_valid_format, "DL-102-175578760328916906")
+
+def bench_build_auth_headers_from_tracker(benchmark):
+    tracker = make_tracker()
+    assert benchmark(build_auth_headers_from_tracker, tracker)["Authorization"] == "Bearer benchmark-token"
+
+def bench_decode_license_record(benchmark):
+    def decode():
+        return LicenseRecord.from_dict(APIResponse.from_json(RESPONSE_BODY).data)
+
+    assert benchmark(decode).license_status == "PRINTED"
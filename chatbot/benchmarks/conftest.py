@@ -0,0 +1,77 @@
+"""
+Shared fixtures for the benchmark suite.
+Actions run against an in-process fake backend (httpx.MockTransport), so the
+numbers measure the action server's own work rather than the network.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the chatbot directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_client
+from rasa_sdk import Tracker
+
+SAMPLE_LICENSE = {
+    "id": 152,
+    "userId": 102,
+    "licenseNumber": "DL-102-175578760328916906",
+    "issueDate": "2025-08-21T14:46:43.290+00:00",
+    "expirationDate": "2035-08-21T14:46:43.290+00:00",
+    "firstName": "Alex",
+    "lastName": "Rogers",
+    "vehicleType": "Car",
+    "vehicleMake": "Toyota",
+    "address": "123 Main St, Springfield, IL",
+    "licenseStatus": "PRINTED",
+}
+
+RESPONSE_BODY = json.dumps({
+    "success": True,
+    "message": "Driving license retrieved successfully",
+    "data": SAMPLE_LICENSE,
+}).encode()
+
+def fake_backend(request: httpx.Request) -> httpx.Response:
+    """Answer every /drivingLicense call with a successful response."""
+    return httpx.Response(200, content=RESPONSE_BODY, headers={"Content-Type": "application/json"})
+
+@pytest.fixture
+def event_loop():
+    """Event loop shared by all rounds of one benchmark."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture
+def fake_client(event_loop):
+    """Install an async API client wired to the fake backend, with caching and deduplication off."""
+    async def create():
+        return api_client.AsyncLicenseAPIClient(transport=httpx.MockTransport(fake_backend))
+
+    client = event_loop.run_until_complete(create())
+    client.cache = None
+    client.dedup = None
+    api_client._async_client = client
+    yield client
+    event_loop.run_until_complete(client.aclose())
+    api_client._async_client = None
+
+def make_tracker(slots=None, token="benchmark-token"):
+    """Build a tracker as the action server would for one incoming call."""
+    return Tracker(
+        "benchmark-user",
+        slots or {},
+        {"text": "benchmark", "intent": {}, "entities": [], "metadata": {"token": token}},
+        [],
+        False,
+        None,
+        {},
+        "action_listen",
+    )
@@ -9,6 +9,8 @@ echo "🚗 Starting Driving License Management Chatbot..."
 cleanup() {
     echo "🛑 Shutting down gracefully..."
     kill $RASA_PID $ACTION_PID 2>/dev/null || true
+    # Let the action server workers finish their in-flight requests
+    wait $RASA_PID $ACTION_PID 2>/dev/null || true
     exit 0
 }
 
@@ -21,9 +23,9 @@ if [ ! -f "/app/models/latest.tar.gz" ]; then
     rasa train
 fi
 
-# Start action server in background
+# Start action server workers (one per CPU unless ACTION_SERVER_WORKERS is set) in background
 echo "🔧 Starting action server..."
-rasa run actions --port 5055 --cors "*" &
+python action_launcher.py --port 5055 --cors "*" &
 ACTION_PID=$!
 
 # Wait a moment for action server to start
@@ -0,0 +1,122 @@
+"""
+Backend Health Monitor for Driving License Management System
+This file contains the background task that warms the connection pool to the
+backend when the action server starts and keeps probing its health and latency.
+Its status is the action server's readiness signal (GET /ready).
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+import logging
+
+import httpx
+
+from api_client import get_async_client
+from api_config import APIConfig
+import metrics_stuff
+
+logger = logging.getLogger(__name__)
+
+class BackendHealthMonitor:
+    """Warms up backend connections, then probes the backend's health endpoint.
+
+    The action server is ready once warm-up has finished. With
+    API_READINESS_REQUIRE_BACKEND=true it also has to see a healthy backend.
+    """
+
+    def __init__(self, warmup_connections: int = APIConfig.WARMUP_CONNECTIONS,
+                 interval: float = APIConfig.HEALTH_INTERVAL,
+                 timeout: float = APIConfig.HEALTH_TIMEOUT,
+                 failure_threshold: int = APIConfig.HEALTH_FAILURE_THRESHOLD,
+                 require_backend: bool = APIConfig.READINESS_REQUIRE_BACKEND):
+        self.warmup_connections = warmup_connections
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.require_backend = require_backend
+
+        self.warmed_up = False
+        self.backend_healthy = False
+        self.consecutive_failures = 0
+        self.last_latency: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """Check whether the action server should receive traffic."""
+        return self.warmed_up and (self.backend_healthy or not self.require_backend)
+
+    def status(self) -> Dict[str, Any]:
+        """Get the readiness status reported by GET /ready."""
+        return {
+            "ready": self.ready,
+            "warmed_up": self.warmed_up,
+            "backend_healthy": self.backend_healthy,
+            "backend_latency_ms": round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked_seconds_ago": round(time.monotonic() - self.last_checked, 1)
+                                        if self.last_checked is not None else None,
+        }
+
+    def start(self) -> None:
+        """Start warm-up and health probing on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop health probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        await self.warm_up()
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    async def warm_up(self) -> None:
+        """Open pooled connections to the backend before the first user turn needs them.
+
+        Sends concurrent health checks so the pool holds up to `warmup_connections`
+        keep-alive connections with DNS, TCP and TLS setup already paid for.
+        """
+        started = time.monotonic()
+        results = await asyncio.gather(*(self.check() for _ in range(max(1, self.warmup_connections))))
+        self.warmed_up = True
+        logger.info(f"Backend warm-up finished in {time.monotonic() - started:.2f}s "
+                    f"({sum(results)}/{len(results)} health checks succeeded)")
+
+    async def check(self) -> bool:
+        """Probe the backend health endpoint once and update the status."""
+        url = APIConfig.BASE_URL + APIConfig.HEALTH_PATH
+        started = metrics_stuff.backend_call_started("health")
+        status = "error"
+        try:
+            response = await get_async_client().client.get(url, timeout=self.timeout)
+            status = response.status_code
+            healthy = response.is_success
+        except httpx.HTTPError as e:
+            logger.debug(f"Backend health check failed: {e}")
+            healthy = False
+        finally:
+            metrics_stuff.backend_call_finished("health", status, started)
+
+        self.last_latency = time.perf_counter() - started
+        self.last_checked = time.monotonic()
+        if healthy:
+            if not self.backend_healthy:
+                logger.info(f"Backend is healthy ({self.last_latency * 1000:.0f}ms)")
+            self.backend_healthy = True
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            if self.backend_healthy and self.consecutive_failures >= self.failure_threshold:
+                logger.warning(f"Backend is unhealthy after {self.consecutive_failures} failed health checks")
+                self.backend_healthy = False
+        return healthy
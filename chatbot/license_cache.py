@@ -0,0 +1,145 @@
+"""
+License Cache for Driving License Management System
+This file contains the in-process cache for license details read from the API,
+and the window that remembers recent updates so repeats are not sent again.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import logging
+
+from api_config import APIConfig
+
+logger = logging.getLogger(__name__)
+
+class LicenseCache:
+    """Bounded TTL/LRU cache of license details, scoped by the user's bearer token.
+
+    Entries are grouped per token so that a mutation can drop everything cached
+    for that user at once. The least recently used token is evicted when the
+    cache is full. Entries are fresh for `ttl` seconds and are kept for another
+    `max_stale` seconds so that callers can still fall back to them.
+    """
+
+    def __init__(self, max_entries: int = APIConfig.CACHE_MAX_ENTRIES,
+                 ttl: float = APIConfig.CACHE_TTL,
+                 max_stale: float = max(APIConfig.CACHE_STALE_WHILE_REVALIDATE, APIConfig.CACHE_STALE_IF_ERROR)):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: "OrderedDict[str, Dict[Hashable, Tuple[float, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(params: Optional[Dict[str, Any]]) -> Hashable:
+        """Build a hashable key from request parameters."""
+        return tuple(sorted((params or {}).items()))
+
+    def get(self, token: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Get a cached value, or None if it is missing or no longer fresh."""
+        entry = self.get_entry(token, params)
+        if entry is None or entry[1] >= self.ttl:
+            return None
+        return entry[0]
+
+    def get_entry(self, token: str, params: Optional[Dict[str, Any]] = None) -> Optional[Tuple[Any, float]]:
+        """Get a cached value with its age in seconds, fresh or stale, or None if it is missing."""
+        key = self.make_key(params)
+        with self._lock:
+            token_entries = self._entries.get(token)
+            if not token_entries or key not in token_entries:
+                return None
+
+            stored_at, value = token_entries[key]
+            age = time.monotonic() - stored_at
+            if age >= self.ttl + self.max_stale:
+                del token_entries[key]
+                if not token_entries:
+                    del self._entries[token]
+                return None
+
+            self._entries.move_to_end(token)
+            return value, age
+
+    def set(self, token: str, params: Optional[Dict[str, Any]], value: Any) -> None:
+        """Cache a value for the token and parameters."""
+        key = self.make_key(params)
+        with self._lock:
+            token_entries = self._entries.setdefault(token, {})
+            token_entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(token)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        """Drop every entry cached for the token."""
+        with self._lock:
+            if self._entries.pop(token, None) is not None:
+                logger.debug("License cache invalidated for token")
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+class DedupWindow:
+    """Short-lived record of update outcomes, keyed by token, endpoint and payload.
+
+    Lets a user repeat the same update (e.g. resend an address) within `window`
+    seconds without a second backend write. Like LicenseCache, entries are grouped
+    per token so any other update by that user drops them all.
+    """
+
+    def __init__(self, window: float = APIConfig.DEDUP_WINDOW,
+                 max_entries: int = APIConfig.CACHE_MAX_ENTRIES):
+        self.window = window
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[Hashable, Tuple[float, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(endpoint_name: str, params: Optional[Dict[str, Any]],
+                 body: Optional[Dict[str, Any]]) -> Hashable:
+        """Build a key from the endpoint and a hash of the request payload."""
+        payload = json.dumps([params, body], sort_keys=True, default=str)
+        return endpoint_name, hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, token: str, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Get a recorded outcome with its age in seconds, or None if there is none within the window."""
+        with self._lock:
+            token_entries = self._entries.get(token)
+            if not token_entries or key not in token_entries:
+                return None
+
+            stored_at, value = token_entries[key]
+            age = time.monotonic() - stored_at
+            if age >= self.window:
+                del token_entries[key]
+                if not token_entries:
+                    del self._entries[token]
+                return None
+            return value, age
+
+    def set(self, token: str, key: Hashable, value: Any) -> None:
+        """Record the outcome of an update."""
+        with self._lock:
+            token_entries = self._entries.setdefault(token, {})
+            token_entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(token)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        """Forget every outcome recorded for the token."""
+        with self._lock:
+            self._entries.pop(token, None)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Load test for the Rasa action server.
+This script starts a local stub of the /drivingLicense backend and drives the
+action server's /webhook with concurrent synthetic action calls, then reports
+throughput and p50/p95/p99 latency per action.
+
+Examples:
+    # Stub backend only (point an action server at it with API_BASE_URL)
+    python load_test.py stub --stub-port 7600 --latency-ms 50 --error-rate 0.01
+
+    # Stub backend + action server started by this script + load
+    python load_test.py run --spawn-action-server --concurrency 100 --requests 5000
+
+    # Load an action server that is already running against the stub
+    python load_test.py run --webhook-url http://localhost:5055/webhook --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+# Sample record returned by the stub backend (same shape as the real API)
+SAMPLE_LICENSE = {
+    "id": 152,
+    "userId": 102,
+    "licenseNumber": "DL-102-175578760328916906",
+    "issueDate": "2025-08-21T14:46:43.290+00:00",
+    "expirationDate": "2035-08-21T14:46:43.290+00:00",
+    "firstName": "Alex",
+    "lastName": "Rogers",
+    "vehicleType": "Car",
+    "vehicleMake": "Toyota",
+    "address": "123 Main St, Springfield, IL",
+    "licenseStatus": "PRINTED",
+}
+
+# Slots each action needs to take its main (backend-calling) path
+DEFAULT_ACTION_SLOTS = {
+    "action_validate_license": {"license_number": SAMPLE_LICENSE["licenseNumber"]},
+    "action_authenticate_user": {"license_number": SAMPLE_LICENSE["licenseNumber"], "full_name": "Alex Rogers"},
+    "action_check_license_status": {},
+    "action_license_not_received": {},
+    "action_change_address": {"new_address": "742 Evergreen Terrace, Springfield, IL"},
+    "action_update_license_status": {"new_status": "DISPATCHED"},
+    "action_renew_license": {},
+}
+
+# Replies that mean the action fell back instead of doing its job (backend error, shed, busy).
+# The action server still answers these with HTTP 200.
+DEGRADED_PREFIXES = ("❌", "⏳")
+
+STUB_ROUTES = {
+    ("GET", "/drivingLicense/getLicenseDetails"): "Driving license retrieved successfully",
+    ("POST", "/drivingLicense/create"): "Driving license created successfully",
+    ("POST", "/drivingLicense/updateStatus"): "Driving license status updated successfully",
+    ("POST", "/drivingLicense/changeAddress"): "Driving license address changed successfully",
+    ("POST", "/drivingLicense/renewLicense"): "Driving license renewed successfully",
+}
+
+def sample_latency(distribution: str, mean_ms: float, jitter_ms: float) -> float:
+    """Draw one simulated backend latency (in seconds)."""
+    if mean_ms <= 0:
+        return 0.0
+    if distribution == "uniform":
+        value = random.uniform(max(0.0, mean_ms - jitter_ms), mean_ms + jitter_ms)
+    elif distribution == "exponential":
+        value = random.expovariate(1.0 / mean_ms)
+    elif distribution == "lognormal":
+        # Parameterised so the median is mean_ms with a long right tail
+        value = random.lognormvariate(0, max(jitter_ms / mean_ms, 0.01)) * mean_ms
+    else:
+        value = mean_ms
+    return value / 1000.0
+
+def create_stub_server(host: str, port: int, distribution: str, latency_ms: float,
+                       jitter_ms: float, error_rate: float) -> ThreadingHTTPServer:
+    """Create a stub of the /drivingLicense backend."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method: str) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+
+            time.sleep(sample_latency(distribution, latency_ms, jitter_ms))
+
+            message = STUB_ROUTES.get((method, urlparse(self.path).path))
+            if message is None:
+                status, body = 404, {"success": False, "message": "Not found"}
+            elif random.random() < error_rate:
+                status, body = 503, {"success": False, "message": "Simulated backend error"}
+            else:
+                status, body = 200, {"success": True, "message": message, "data": SAMPLE_LICENSE}
+
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    return server
+
+def start_stub_server(args) -> ThreadingHTTPServer:
+    """Start the stub backend in a background thread."""
+    server = create_stub_server(args.stub_host, args.stub_port, args.latency_dist,
+                                args.latency_ms, args.latency_jitter_ms, args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 Stub backend listening on http://{args.stub_host}:{args.stub_port} "
+          f"({args.latency_dist} latency {args.latency_ms}ms, error rate {args.error_rate:.1%})")
+    return server
+
+def spawn_action_server(args) -> subprocess.Popen:
+    """Start an action server pointed at the stub backend.
+
+    Repeated updates are always sent (no dedup window), and with --no-cache
+    every license lookup reaches the stub too.
+    """
+    env = dict(os.environ, API_BASE_URL=f"http://{args.stub_host}:{args.stub_port}", API_DEDUP_WINDOW="0")
+    if args.no_cache:
+        env["API_CACHE_ENABLED"] = "false"
+    port = urlparse(args.webhook_url).port or 5055
+    process = subprocess.Popen(
+        [sys.executable, "-m", "rasa_sdk", "--actions", "actions", "--port", str(port)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+
+    health_url = args.webhook_url.rsplit("/", 1)[0] + "/health"
+    for _ in range(120):
+        try:
+            if httpx.get(health_url, timeout=1).status_code == 200:
+                print(f"🔧 Action server ready at {args.webhook_url}")
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("Action server exited during startup")
+        time.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError("Action server did not become healthy in time")
+
+def build_action_call(action_name: str, slots: Dict[str, Any], token: str) -> Dict[str, Any]:
+    """Build a synthetic /webhook payload as sent by the Rasa server."""
+    sender_id = f"load-{uuid.uuid4().hex[:12]}"
+    return {
+        "next_action": action_name,
+        "sender_id": sender_id,
+        "version": "3.6.2",
+        "domain": {},
+        "tracker": {
+            "sender_id": sender_id,
+            "slots": dict(slots, authenticated=True),
+            "latest_message": {
+                "text": "load test",
+                "intent": {"name": "load_test", "confidence": 1.0},
+                "entities": [],
+                "metadata": {"token": token},
+            },
+            "events": [],
+            "paused": False,
+            "followup_action": None,
+            "active_loop": {},
+            "latest_action_name": "action_listen",
+        },
+    }
+
+def is_degraded(reply: Dict[str, Any]) -> bool:
+    """Check whether a webhook reply carries an action's fallback message."""
+    return any((message.get("text") or "").startswith(DEGRADED_PREFIXES)
+               for message in reply.get("responses", []))
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Get a percentile from already sorted values (nearest rank)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+async def drive_load(args) -> Dict[str, Dict[str, Any]]:
+    """Send concurrent action calls and collect latencies per action."""
+    actions = args.actions.split(",") if args.actions else list(DEFAULT_ACTION_SLOTS)
+    tokens = [f"load-test-token-{i}" for i in range(args.users)]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    stop_at = time.monotonic() + args.duration if args.duration else None
+    remaining = [args.requests]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+
+        async def worker() -> None:
+            while True:
+                if stop_at is not None:
+                    if time.monotonic() >= stop_at:
+                        return
+                elif remaining[0] <= 0:
+                    return
+                else:
+                    remaining[0] -= 1
+
+                action_name = random.choice(actions)
+                payload = build_action_call(action_name, DEFAULT_ACTION_SLOTS.get(action_name, {}),
+                                            random.choice(tokens))
+                started = time.perf_counter()
+                try:
+                    response = await client.post(args.webhook_url, json=payload)
+                    ok = response.status_code == 200 and not is_degraded(response.json())
+                except (httpx.HTTPError, ValueError):
+                    ok = False
+                latencies[action_name].append(time.perf_counter() - started)
+                if not ok:
+                    errors[action_name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for action_name, values in sorted(latencies.items()):
+        values.sort()
+        results[action_name] = {
+            "requests": len(values),
+            "errors": errors[action_name],
+            "throughput": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+        }
+    total = sum(len(values) for values in latencies.values())
+    results["__total__"] = {"requests": total, "elapsed_s": elapsed,
+                            "throughput": total / elapsed if elapsed else 0.0}
+    return results
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    """Print the latency report."""
+    total = results.pop("__total__")
+    print("\n" + "=" * 86)
+    print(f"{'action':<32}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    print("-" * 86)
+    for action_name, row in results.items():
+        print(f"{action_name:<32}{row['requests']:>9}{row['errors']:>8}{row['throughput']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+    print("-" * 86)
+    print(f"🏁 {total['requests']} requests in {total['elapsed_s']:.1f}s "
+          f"({total['throughput']:.1f} req/s)")
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Create the command line parser."""
+    parser = argparse.ArgumentParser(description="Load test the Rasa action server against a stub backend.")
+    parser.add_argument("mode", choices=["stub", "run"],
+                        help="'stub' only serves the fake backend, 'run' also drives load")
+
+    stub = parser.add_argument_group("stub backend")
+    stub.add_argument("--stub-host", default="127.0.0.1")
+    stub.add_argument("--stub-port", type=int, default=7600)
+    stub.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"],
+                      default="lognormal")
+    stub.add_argument("--latency-ms", type=float, default=50.0, help="mean/median backend latency")
+    stub.add_argument("--latency-jitter-ms", type=float, default=25.0,
+                      help="spread for uniform/lognormal latency")
+    stub.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+
+    load = parser.add_argument_group("load")
+    load.add_argument("--webhook-url", default="http://localhost:5055/webhook")
+    load.add_argument("--spawn-action-server", action="store_true",
+                      help="start an action server pointed at the stub")
+    load.add_argument("--no-cache", action="store_true",
+                      help="turn the spawned action server's license cache off, so every lookup hits the stub")
+    load.add_argument("--concurrency", type=int, default=50)
+    load.add_argument("--requests", type=int, default=2000, help="total requests (ignored with --duration)")
+    load.add_argument("--duration", type=float, default=None, help="run for this many seconds")
+    load.add_argument("--users", type=int, default=200, help="distinct user tokens to spread calls over")
+    load.add_argument("--actions", default=None,
+                      help="comma separated action names (default: all backend actions)")
+    load.add_argument("--timeout", type=float, default=30.0, help="webhook request timeout")
+    load.add_argument("--json", dest="json_output", default=None, help="also write results to this file")
+    return parser
+
+def main():
+    """Main load test function."""
+    args = create_argument_parser().parse_args()
+
+    print("🚗 Action Server Load Test")
+    print("=" * 50)
+    server = start_stub_server(args)
+
+    if args.mode == "stub":
+        print("Press Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    action_server: Optional[subprocess.Popen] = None
+    try:
+        if args.spawn_action_server:
+            action_server = spawn_action_server(args)
+        print(f"📡 Driving {args.webhook_url} with {args.concurrency} concurrent clients...")
+        results = asyncio.run(drive_load(args))
+        if args.json_output:
+            with open(args.json_output, "w") as f:
+                json.dump(results, f, indent=2)
+        print_report(results)
+    finally:
+        if action_server is not None:
+            action_server.terminate()
+            try:
+                action_server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                action_server.kill()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Logging for Driving License Management System
+This file contains the non-blocking logging pipeline of the action server.
+Records are queued by the calling thread and written by a background listener,
+so slow log collectors never delay a user's turn.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from opentelemetry import trace
+
+LOG_LEVEL = os.getenv("LOG_LEVEL")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json or text
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Per call site and second: log the first LOG_SAMPLE_INITIAL records, then every
+# LOG_SAMPLE_THEREAFTER-th one. Errors are never sampled.
+LOG_SAMPLING_ENABLED = os.getenv("LOG_SAMPLING_ENABLED", "true").lower() == "true"
+LOG_SAMPLE_INITIAL = int(os.getenv("LOG_SAMPLE_INITIAL", "20"))
+LOG_SAMPLE_THEREAFTER = int(os.getenv("LOG_SAMPLE_THEREAFTER", "100"))
+
+# Debug payload events
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "1024"))
+
+SENSITIVE_KEYS = frozenset({"licenseNumber", "Authorization", "token"})
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """Samples repetitive records per call site so a hot loop cannot flood the logs."""
+
+    def __init__(self, initial: int = LOG_SAMPLE_INITIAL, thereafter: int = LOG_SAMPLE_THEREAFTER):
+        super().__init__()
+        self.initial = initial
+        self.thereafter = max(1, thereafter)
+        self._window = 0
+        self._counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+
+        window = int(record.created)
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._counts.clear()
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+        return count <= self.initial or (count - self.initial) % self.thereafter == 0
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the calling thread before handing off
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        # Correlate with the active trace, if any
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        return record
+
+_queue_handler = None
+_listener = None
+_listener_lock = threading.Lock()
+
+def configure_logging() -> None:
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Handlers already installed on the root logger (e.g. by the Rasa CLI) are moved
+    behind the queue; if there are none, records go to stdout. With LOG_FORMAT=json
+    they are written as JSON lines. Calling this more than once has no effect.
+    """
+    global _queue_handler, _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+
+        root = logging.getLogger()
+        if LOG_LEVEL:
+            root.setLevel(LOG_LEVEL.upper())
+
+        handlers = list(root.handlers) or [logging.StreamHandler(sys.stdout)]
+        if LOG_FORMAT == "json":
+            for handler in handlers:
+                handler.setFormatter(JsonFormatter())
+
+        _queue_handler = _NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        if LOG_SAMPLING_ENABLED:
+            _queue_handler.addFilter(SamplingFilter())
+
+        for handler in handlers:
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        # Forked workers (e.g. Sanic) do not inherit the listener thread
+        os.register_at_fork(after_in_child=_restart_listener)
+
+def stop_logging() -> None:
+    """Write out the queued records and stop the listener thread.
+
+    Runs at exit; call it directly before leaving a process with os._exit,
+    which skips atexit handlers.
+    """
+    with _listener_lock:
+        if _listener is not None and _listener._thread is not None:
+            _listener.stop()
+
+def _restart_listener() -> None:
+    # The parent's queue may have been locked by its listener thread at fork time
+    _queue_handler.queue = _listener.queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener._thread = None
+    _listener.start()
+
+def _mask(payload: Any) -> Any:
+    if isinstance(payload, dict):
+        return {key: "***" if key in SENSITIVE_KEYS else _mask(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [_mask(item) for item in payload]
+    return payload
+
+def debug_payload(logger: logging.Logger, event: str, payload: Any) -> None:
+    """Log a sampled, size-capped and masked debug event carrying a payload."""
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+
+    text = json.dumps(_mask(payload), default=str, ensure_ascii=False)
+    if len(text) > LOG_PAYLOAD_MAX_CHARS:
+        text = text[:LOG_PAYLOAD_MAX_CHARS] + f"...({len(text)} chars)"
+    logger.debug(event, extra={"event": event, "payload": text})
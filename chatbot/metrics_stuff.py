@@ -0,0 +1,161 @@
+"""
+Metrics for Driving License Management System
+This file contains the OpenTelemetry metrics recorded by the action server:
+action latency, backend calls, retries, timeouts and license cache efficiency.
+Metrics are exported via OTLP and exposed for Prometheus at /metrics.
+"""
+
+import os
+import threading
+import time
+from typing import Tuple, Union
+
+# Metrics are on unless OTEL_METRICS_ENABLED is set to false
+METRICS_ENABLED = os.getenv("OTEL_METRICS_ENABLED", "true").lower() == "true"
+PROMETHEUS_ENABLED = os.getenv("OTEL_METRICS_PROMETHEUS_ENABLED", "true").lower() == "true"
+OTLP_ENABLED = os.getenv("OTEL_METRICS_OTLP_ENABLED", "true").lower() == "true"
+
+class _Instruments:
+    """The metric instruments, created once the meter provider is configured."""
+
+    def __init__(self, meter):
+        self.action_duration = meter.create_histogram(
+            "action.duration", unit="ms", description="Duration of custom action runs")
+        self.actions_in_flight = meter.create_up_down_counter(
+            "action.in_flight", description="Custom action runs in progress")
+        self.bulkhead_rejections = meter.create_counter(
+            "action.bulkhead_rejections", description="Custom action runs rejected because their bulkhead was full")
+        self.backend_duration = meter.create_histogram(
+            "api.request.duration", unit="ms", description="Duration of backend API calls")
+        self.backend_in_flight = meter.create_up_down_counter(
+            "api.request.in_flight", description="Backend API calls in progress")
+        self.retries = meter.create_counter(
+            "api.retries", description="Backend API calls retried")
+        self.timeouts = meter.create_counter(
+            "api.timeouts", description="Backend API calls that timed out or hit the action deadline")
+        self.rate_limited = meter.create_counter(
+            "api.rate_limited", description="Backend API calls delayed or shed by the rate limiter")
+        self.cache_lookups = meter.create_counter(
+            "license_cache.lookups", description="License details reads by cache result")
+        self.deduplicated = meter.create_counter(
+            "api.deduplicated", description="Repeated backend updates answered with the previous outcome")
+        self.queued_writes = meter.create_counter(
+            "write_queue.writes", description="Write-behind queue updates by outcome")
+
+_instruments = None
+_instruments_lock = threading.Lock()
+
+def configure_metrics():
+    """Configure OpenTelemetry metrics with OTLP and Prometheus readers."""
+    # Imported here so nothing is loaded when metrics are disabled
+    from opentelemetry import metrics
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import Resource
+
+    resource = Resource.create({
+        "service.name": "chatbot-rasa",
+        "service.version": "1.0.0",
+        # One instance per process: action_launcher.py runs several workers per host
+        "service.instance.id": f"{os.getenv('HOSTNAME', 'localhost')}-{os.getpid()}",
+        "process.pid": os.getpid(),
+    })
+
+    readers = []
+    if PROMETHEUS_ENABLED:
+        from opentelemetry.exporter.prometheus import PrometheusMetricReader
+        readers.append(PrometheusMetricReader())
+    if OTLP_ENABLED:
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        readers.append(PeriodicExportingMetricReader(
+            OTLPMetricExporter(
+                endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317"),
+                insecure=True,
+            ),
+            export_interval_millis=int(os.getenv("OTEL_METRIC_EXPORT_INTERVAL", "60000")),
+        ))
+
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=readers))
+    return _Instruments(metrics.get_meter(__name__))
+
+def _get_instruments() -> _Instruments:
+    """Get the metric instruments, configuring metrics on first use."""
+    global _instruments
+    if _instruments is None:
+        with _instruments_lock:
+            if _instruments is None:
+                _instruments = configure_metrics()
+    return _instruments
+
+def action_started(action_name: str) -> float:
+    """Count an action run as in flight; returns the start time for action_finished."""
+    if METRICS_ENABLED:
+        _get_instruments().actions_in_flight.add(1, {"action.name": action_name})
+    return time.perf_counter()
+
+def action_finished(action_name: str, outcome: str, started: float) -> None:
+    """Record the duration of an action run started with action_started."""
+    if not METRICS_ENABLED:
+        return
+    instruments = _get_instruments()
+    instruments.actions_in_flight.add(-1, {"action.name": action_name})
+    instruments.action_duration.record((time.perf_counter() - started) * 1000,
+                                       {"action.name": action_name, "action.outcome": outcome})
+
+def count_bulkhead_rejection(bulkhead: str) -> None:
+    """Count an action run rejected by a full bulkhead ("reads" or "updates")."""
+    if METRICS_ENABLED:
+        _get_instruments().bulkhead_rejections.add(1, {"action.bulkhead": bulkhead})
+
+def backend_call_started(endpoint_name: str) -> float:
+    """Count a backend call as in flight; returns the start time for backend_call_finished."""
+    if METRICS_ENABLED:
+        _get_instruments().backend_in_flight.add(1, {"api.endpoint": endpoint_name})
+    return time.perf_counter()
+
+def backend_call_finished(endpoint_name: str, status: Union[int, str], started: float) -> None:
+    """Record a backend call by HTTP status code, or "error"/"timeout" if none was received."""
+    if not METRICS_ENABLED:
+        return
+    instruments = _get_instruments()
+    instruments.backend_in_flight.add(-1, {"api.endpoint": endpoint_name})
+    instruments.backend_duration.record((time.perf_counter() - started) * 1000,
+                                        {"api.endpoint": endpoint_name, "http.status_code": str(status)})
+
+def count_retry(endpoint_name: str) -> None:
+    """Count a retried backend call."""
+    if METRICS_ENABLED:
+        _get_instruments().retries.add(1, {"api.endpoint": endpoint_name})
+
+def count_timeout(endpoint_name: str, reason: str) -> None:
+    """Count a backend call that timed out ("connect", "read", ...) or ran out of action deadline."""
+    if METRICS_ENABLED:
+        _get_instruments().timeouts.add(1, {"api.endpoint": endpoint_name, "api.timeout_reason": reason})
+
+def count_rate_limited(endpoint_name: str, outcome: str) -> None:
+    """Count a backend call held back by the rate limiter: "delayed" or "shed"."""
+    if METRICS_ENABLED:
+        _get_instruments().rate_limited.add(1, {"api.endpoint": endpoint_name, "api.rate_limit_outcome": outcome})
+
+def count_cache_lookup(result: str) -> None:
+    """Count a license details read by cache result: "hit", "stale", "stale_if_error", "miss" or "coalesced"."""
+    if METRICS_ENABLED:
+        _get_instruments().cache_lookups.add(1, {"license_cache.result": result})
+
+def count_deduplicated(endpoint_name: str) -> None:
+    """Count an update that was not sent because an identical one had just been made."""
+    if METRICS_ENABLED:
+        _get_instruments().deduplicated.add(1, {"api.endpoint": endpoint_name})
+
+def count_queued_write(outcome: str) -> None:
+    """Count a write-behind queue event: "enqueued", "delivered", "retried" or "failed"."""
+    if METRICS_ENABLED:
+        _get_instruments().queued_writes.add(1, {"write_queue.outcome": outcome})
+
+def scrape() -> Tuple[bytes, str]:
+    """Render the current metrics in Prometheus text format, with its content type."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+    if METRICS_ENABLED:
+        _get_instruments()
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,15 @@
+"""
+Action Server Plugins for Driving License Management System
+This package is discovered by rasa_sdk when the action server starts and
+attaches our routes and listeners to its Sanic app.
+"""
+
+import pluggy
+
+from rasa_sdk_plugins import metrics, readiness, write_behind
+
+def init_hooks(manager: pluggy.PluginManager) -> None:
+    """Register the plugin modules with the rasa_sdk plugin manager."""
+    manager.register(metrics)
+    manager.register(readiness)
+    manager.register(write_behind)
@@ -0,0 +1,22 @@
+"""
+Prometheus scrape endpoint for the action server.
+"""
+
+import pluggy
+from sanic import Sanic, response
+from sanic.request import Request
+
+import metrics_stuff
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    """Expose GET /metrics in Prometheus text format."""
+    if not (metrics_stuff.METRICS_ENABLED and metrics_stuff.PROMETHEUS_ENABLED):
+        return
+
+    @app.get("/metrics")
+    async def prometheus_metrics(request: Request) -> response.HTTPResponse:
+        body, content_type = metrics_stuff.scrape()
+        return response.raw(body, content_type=content_type)
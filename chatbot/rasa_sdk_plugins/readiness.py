@@ -0,0 +1,32 @@
+"""
+Backend warm-up, health monitoring and readiness endpoint for the action server.
+"""
+
+import pluggy
+from sanic import Sanic, response
+from sanic.request import Request
+
+from health_monitor import BackendHealthMonitor
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    """Run the backend health monitor with the server and expose GET /ready."""
+
+    @app.listener("after_server_start")
+    async def start_health_monitor(app: Sanic, loop) -> None:
+        app.ctx.health_monitor = BackendHealthMonitor()
+        app.ctx.health_monitor.start()
+
+    @app.listener("before_server_stop")
+    async def stop_health_monitor(app: Sanic, loop) -> None:
+        monitor = getattr(app.ctx, "health_monitor", None)
+        if monitor is not None:
+            await monitor.stop()
+
+    @app.get("/ready")
+    async def ready(request: Request) -> response.HTTPResponse:
+        monitor = getattr(request.app.ctx, "health_monitor", None)
+        status = monitor.status() if monitor is not None else {"ready": False}
+        return response.json(status, status=200 if status["ready"] else 503)
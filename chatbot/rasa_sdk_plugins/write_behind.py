@@ -0,0 +1,26 @@
+"""
+Write-behind queue worker for the action server.
+"""
+
+import pluggy
+from sanic import Sanic
+
+from api_config import APIConfig
+from write_queue import get_write_queue
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    """Deliver queued updates in the background while the server runs."""
+    if not APIConfig.WRITE_BEHIND_ENABLED:
+        return
+
+    @app.listener("after_server_start")
+    async def start_write_queue(app: Sanic, loop) -> None:
+        # Also picks up updates queued before a restart
+        get_write_queue().start()
+
+    @app.listener("before_server_stop")
+    async def stop_write_queue(app: Sanic, loop) -> None:
+        await get_write_queue().stop()
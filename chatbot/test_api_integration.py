@@ -6,7 +6,7 @@ This script tests the API endpoints and configuration.
 
 import os
 import sys
-import requests
+import httpx
 import json
 from datetime import datetime
 
@@ -20,7 +20,7 @@ def test_api_connectivity():
     print("🔍 Testing API connectivity...")
     
     try:
-        response = requests.get(APIConfig.BASE_URL, timeout=5)
+        response = httpx.get(APIConfig.BASE_URL, timeout=5)
         print(f"✅ API base URL accessible: {response.status_code}")
         return True
     except Exception as e:
@@ -35,7 +35,7 @@ def test_get_license_details():
         # Test with a sample license number (you'll need to replace this with a real one)
         test_license = "DL-102-175578760328916906"  # Replace with actual license from your API
         
-        response = requests.get(
+        response = httpx.get(
             APIConfig.get_endpoint_url("get_license_details"),
             headers=APIConfig.get_auth_headers(),
             params={"licenseNumber": test_license},
@@ -80,7 +80,7 @@ def test_create_license():
             "address": "456 Test Street, Test City, TS 12345"
         }
         
-        response = requests.post(
+        response = httpx.post(
             APIConfig.get_endpoint_url("create_license"),
             headers=APIConfig.get_auth_headers(),
             json=license_data,
@@ -5,7 +5,7 @@ Run this script to test if traces are being sent to your collector on port 4317.
 """
 
 import time
-import requests
+import httpx
 from trace_stuff import trace_stuff, tracer
 
 @trace_stuff("test_api_call")
@@ -13,7 +13,7 @@ def test_api_call():
     """Test function that makes an API call to verify tracing works."""
     try:
         # Make a simple HTTP request (this will be auto-instrumented)
-        response = requests.get("https://httpbin.org/json", timeout=5)
+        response = httpx.get("https://httpbin.org/json", timeout=5)
         print(f"✅ API call successful: {response.status_code}")
         return response.status_code == 200
     except Exception as e:
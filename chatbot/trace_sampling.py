@@ -0,0 +1,142 @@
+"""
+Trace Sampling for Driving License Management System
+This file contains the sampler and span processor that keep tracing cost flat under load.
+It is imported by trace_stuff only once tracing is configured.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import Link, SpanContext, SpanKind, StatusCode, TraceFlags, get_current_span
+from opentelemetry.util.types import Attributes
+
+class SamplingConfig:
+    """Sampling settings read from otel_config.env."""
+
+    # Share of new traces that are sampled (0.0 - 1.0)
+    SAMPLE_RATIO = float(os.getenv("OTEL_TRACES_SAMPLE_RATIO", "1.0"))
+    # Maximum sampled root spans per second for each span name (0 = unlimited)
+    RATE_LIMIT = float(os.getenv("OTEL_TRACES_RATE_LIMIT", "0"))
+    # Export unsampled spans anyway if they fail or are slow
+    KEEP_ERRORS = os.getenv("OTEL_TRACES_KEEP_ERRORS", "true").lower() == "true"
+    KEEP_SLOW_MS = float(os.getenv("OTEL_TRACES_KEEP_SLOW_MS", "1000"))
+
+class _RateLimiter:
+    """Token bucket per span name, refilled at `rate` tokens per second.
+
+    Each bucket holds at least one token, so rates below 1/s still sample.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self._buckets: Dict[str, list] = {}  # name -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def try_acquire(self, name: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(name, [self.burst, now])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+class RateLimitedRatioSampler(Sampler):
+    """Ratio sampler for new traces with a per-span-name rate limit.
+
+    Spans that are not sampled are still recorded (but not exported) when
+    `record_unsampled` is set, so KeepErrorsAndSlowSpansProcessor can promote
+    the ones that fail or run slow.
+    """
+
+    def __init__(self, ratio: float = SamplingConfig.SAMPLE_RATIO,
+                 rate_limit: float = SamplingConfig.RATE_LIMIT,
+                 record_unsampled: bool = SamplingConfig.KEEP_ERRORS):
+        self._ratio_sampler = TraceIdRatioBased(ratio)
+        self._rate_limiter = _RateLimiter(rate_limit) if rate_limit > 0 else None
+        self._unsampled = Decision.RECORD_ONLY if record_unsampled else Decision.DROP
+
+    def should_sample(self, parent_context: Optional[Context], trace_id: int, name: str,
+                      kind: Optional[SpanKind] = None, attributes: Attributes = None,
+                      links: Optional[Sequence[Link]] = None, trace_state=None) -> SamplingResult:
+        result = self._ratio_sampler.should_sample(parent_context, trace_id, name, kind, attributes, links)
+        if result.decision.is_sampled() and (self._rate_limiter is None or self._rate_limiter.try_acquire(name)):
+            return result
+        return SamplingResult(self._unsampled, None, result.trace_state)
+
+    def get_description(self) -> str:
+        return f"RateLimitedRatioSampler{{{self._ratio_sampler.get_description()}}}"
+
+class _RecordOnlySampler(Sampler):
+    """Keeps recording children of unsampled parents so they can be promoted too."""
+
+    def should_sample(self, parent_context: Optional[Context], trace_id: int, name: str,
+                      kind: Optional[SpanKind] = None, attributes: Attributes = None,
+                      links: Optional[Sequence[Link]] = None, trace_state=None) -> SamplingResult:
+        parent_span_context = get_current_span(parent_context).get_span_context()
+        return SamplingResult(Decision.RECORD_ONLY, None, parent_span_context.trace_state)
+
+    def get_description(self) -> str:
+        return "RecordOnlySampler"
+
+def create_sampler() -> Sampler:
+    """Build the parent-based sampler configured through otel_config.env."""
+    root = RateLimitedRatioSampler()
+    if not SamplingConfig.KEEP_ERRORS:
+        return ParentBased(root)
+    return ParentBased(root, local_parent_not_sampled=_RecordOnlySampler())
+
+class KeepErrorsAndSlowSpansProcessor(SpanProcessor):
+    """Forwards sampled spans, plus unsampled spans that failed or were slow."""
+
+    def __init__(self, delegate: SpanProcessor, slow_ms: float = SamplingConfig.KEEP_SLOW_MS):
+        self._delegate = delegate
+        self._slow_ns = int(slow_ms * 1_000_000)
+
+    def on_start(self, span, parent_context: Optional[Context] = None) -> None:
+        self._delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled:
+            self._delegate.on_end(span)
+        elif span.status.status_code == StatusCode.ERROR or span.end_time - span.start_time >= self._slow_ns:
+            self._delegate.on_end(self._promote(span))
+
+    def shutdown(self) -> None:
+        self._delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._delegate.force_flush(timeout_millis)
+
+    @staticmethod
+    def _promote(span: ReadableSpan) -> ReadableSpan:
+        context = span.context
+        return ReadableSpan(
+            name=span.name,
+            context=SpanContext(context.trace_id, context.span_id, context.is_remote,
+                                TraceFlags(TraceFlags.SAMPLED), context.trace_state),
+            parent=span.parent,
+            resource=span.resource,
+            attributes=dict(span.attributes or {}, **{"sampling.promoted": True}),
+            events=span.events,
+            links=span.links,
+            kind=span.kind,
+            status=span.status,
+            start_time=span.start_time,
+            end_time=span.end_time,
+            instrumentation_scope=span.instrumentation_scope,
+        )
@@ -1,23 +1,41 @@
 import os
-from functools import wraps
+import asyncio
+import contextvars
+import inspect
+import threading
+from functools import partial, wraps
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
+
+import metrics_stuff
+
+# Tracing is on unless OTEL_TRACES_ENABLED is set to false
+TRACES_ENABLED = os.getenv("OTEL_TRACES_ENABLED", "true").lower() == "true"
+
+_tracer = None
+_tracer_lock = threading.Lock()
 
 def configure_opentelemetry():
     """Configure OpenTelemetry with OTLP exporter."""
+    # Imported here so that the SDK, gRPC exporter and instrumentations are only
+    # loaded when tracing is actually used
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from trace_sampling import KeepErrorsAndSlowSpansProcessor, SamplingConfig, create_sampler
+
     # Set up resource with service information
     resource = Resource.create({
         "service.name": "chatbot-rasa",
         "service.version": "1.0.0",
-        "service.instance.id": os.getenv("HOSTNAME", "localhost"),
+        # One instance per process: action_launcher.py runs several workers per host
+        "service.instance.id": f"{os.getenv('HOSTNAME', 'localhost')}-{os.getpid()}",
+        "process.pid": os.getpid(),
     })
     
-    # Create tracer provider
-    trace.set_tracer_provider(TracerProvider(resource=resource))
+    # Create tracer provider with the sampling configured in otel_config.env
+    trace.set_tracer_provider(TracerProvider(resource=resource, sampler=create_sampler()))
     
     # Configure OTLP exporter for port 4317 (gRPC)
     otlp_exporter = OTLPSpanExporter(
@@ -27,26 +45,170 @@ def configure_opentelemetry():
     
     # Add span processor
     span_processor = BatchSpanProcessor(otlp_exporter)
+    if SamplingConfig.KEEP_ERRORS:
+        span_processor = KeepErrorsAndSlowSpansProcessor(span_processor)
     trace.get_tracer_provider().add_span_processor(span_processor)
     
-    # Auto-instrument requests library
-    RequestsInstrumentor().instrument()
+    # Auto-instrument the HTTP client
+    HTTPXClientInstrumentor().instrument()
     
     print("✅ OpenTelemetry configured successfully for endpoint:", 
           os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317"))
 
-# Initialize OpenTelemetry when module is imported
-configure_opentelemetry()
+def get_tracer():
+    """Get the module tracer, configuring OpenTelemetry on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                if TRACES_ENABLED:
+                    configure_opentelemetry()
+                _tracer = trace.get_tracer(__name__)
+    return _tracer
 
-# Get tracer instance
-tracer = trace.get_tracer(__name__)
+def __getattr__(name):
+    # Keep `from trace_stuff import tracer` working without configuring at import
+    if name == "tracer":
+        return get_tracer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def trace_stuff(span_name):
-    """Custom decorator to trace a function with given span name."""
+    """Custom decorator to trace a function with given span name.
+
+    Works on plain functions, coroutine functions and sync/async generator
+    functions. A generator's span covers its whole iteration, and the span is
+    active only while the generator body runs, not while the caller holds it.
+    When tracing is disabled the function is returned undecorated.
+    """
     def decorator(func):
+        if not TRACES_ENABLED:
+            return func
+
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            async def async_generator_wrapper(*args, **kwargs):
+                span = get_tracer().start_span(span_name)
+                generator = func(*args, **kwargs)
+                sent, thrown = None, None
+                try:
+                    while True:
+                        with trace.use_span(span):
+                            try:
+                                if thrown is not None:
+                                    item = await generator.athrow(thrown)
+                                else:
+                                    item = await generator.asend(sent)
+                            except StopAsyncIteration:
+                                return
+                        sent, thrown = None, None
+                        try:
+                            sent = yield item
+                        except GeneratorExit:
+                            with trace.use_span(span):
+                                await generator.aclose()
+                            raise
+                        except BaseException as e:
+                            thrown = e
+                finally:
+                    span.end()
+            return async_generator_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                span = get_tracer().start_span(span_name)
+                generator = func(*args, **kwargs)
+                sent, thrown = None, None
+                try:
+                    while True:
+                        with trace.use_span(span):
+                            try:
+                                if thrown is not None:
+                                    item = generator.throw(thrown)
+                                else:
+                                    item = generator.send(sent)
+                            except StopIteration as stop:
+                                return stop.value
+                        sent, thrown = None, None
+                        try:
+                            sent = yield item
+                        except GeneratorExit:
+                            with trace.use_span(span):
+                                generator.close()
+                            raise
+                        except BaseException as e:
+                            thrown = e
+                finally:
+                    span.end()
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            with tracer.start_as_current_span(span_name):
+            with get_tracer().start_as_current_span(span_name):
                 return func(*args, **kwargs)
         return wrapper
     return decorator
+
+def propagate_context(func):
+    """Bind a callable to the caller's context for running on another thread.
+
+    The active span and the action deadline live in context variables, which
+    executor threads do not inherit. The returned callable runs `func` in a copy
+    of the context captured here.
+    """
+    context = contextvars.copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+async def run_in_executor(executor, func, *args, **kwargs):
+    """Run a blocking function on an executor (None for the loop's default) without losing context."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, propagate_context(partial(func, *args, **kwargs)))
+
+def trace_action(run):
+    """Decorator for an async Action.run: traces the run as a span named after the
+    action and records its latency and in-flight metrics.
+
+    When tracing and metrics are both disabled the method is returned undecorated.
+    """
+    if not TRACES_ENABLED and not metrics_stuff.METRICS_ENABLED:
+        return run
+
+    @wraps(run)
+    async def wrapper(self, *args, **kwargs):
+        action_name = self.name()
+        started = metrics_stuff.action_started(action_name)
+        outcome = "error"
+        try:
+            if TRACES_ENABLED:
+                with get_tracer().start_as_current_span(action_name):
+                    result = await run(self, *args, **kwargs)
+            else:
+                result = await run(self, *args, **kwargs)
+            outcome = "success"
+            return result
+        finally:
+            metrics_stuff.action_finished(action_name, outcome, started)
+    return wrapper
+
+def set_span_attribute(key, value):
+    """Set an attribute on the currently active span, if any."""
+    if not TRACES_ENABLED:
+        return
+    trace.get_current_span().set_attribute(key, value)
+
+def add_span_event(name, attributes=None):
+    """Record an event on the currently active span, if any."""
+    if not TRACES_ENABLED:
+        return
+    trace.get_current_span().add_event(name, attributes or {})
@@ -0,0 +1,301 @@
+"""
+Write-Behind Queue for Driving License Management System
+This file contains the durable queue that lets mutating actions answer the user
+right away while their backend update is delivered in the background.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+import logging
+
+from api_client import get_async_client
+from api_config import APIConfig, APIError
+import metrics_stuff
+
+logger = logging.getLogger(__name__)
+
+class WriteQueueError(APIError):
+    """Raised when an update cannot be stored in the write-behind queue."""
+
+class PendingWrite(NamedTuple):
+    id: int
+    method: str
+    endpoint_name: str
+    headers: Dict[str, str]
+    params: Optional[Dict[str, Any]]
+    body: Optional[Dict[str, Any]]
+    idempotency_key: str
+    attempts: int
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_writes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_key TEXT NOT NULL,
+    method TEXT NOT NULL,
+    endpoint_name TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    params TEXT,
+    body TEXT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS pending_writes_by_user ON pending_writes (status, user_key, id);
+"""
+
+class WriteBehindQueue:
+    """SQLite-backed queue of backend updates, delivered in order per user.
+
+    Each update is stored with an idempotency key before the action answers,
+    so it survives action-server restarts. A background worker sends the
+    oldest pending update of each user; the next one for that user waits until
+    it has been delivered. Connection failures and 5xx/429 responses are retried
+    with backoff; other errors, or running out of attempts, mark the update as
+    failed and leave it in the table, without its headers, for inspection.
+
+    Several worker processes may share one database file: each claims an update
+    with a lease before sending it.
+    """
+
+    def __init__(self, path: str = APIConfig.WRITE_QUEUE_PATH,
+                 max_attempts: int = APIConfig.WRITE_QUEUE_MAX_ATTEMPTS,
+                 lease: float = APIConfig.WRITE_QUEUE_LEASE,
+                 poll_interval: float = APIConfig.WRITE_QUEUE_POLL_INTERVAL,
+                 batch_size: int = APIConfig.WRITE_QUEUE_BATCH_SIZE,
+                 failed_retention: float = APIConfig.WRITE_QUEUE_FAILED_RETENTION):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.failed_retention = failed_retention
+        self._next_purge = 0.0
+
+        # SQLite calls block, so they all run on one dedicated thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-queue")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def submit(self, endpoint_name: str, headers: Dict[str, str],
+                     params: Optional[Dict[str, Any]] = None,
+                     json: Optional[Dict[str, Any]] = None,
+                     method: str = "POST") -> bool:
+        """Store an update for background delivery; returns True once it is durable."""
+        idempotency_key = uuid.uuid4().hex
+        try:
+            await self._call(self._insert, method, endpoint_name, headers, params, json, idempotency_key)
+        except sqlite3.Error as e:
+            raise WriteQueueError(f"Could not queue {method} {endpoint_name}: {e}") from e
+
+        metrics_stuff.count_queued_write("enqueued")
+        # Cached reads no longer reflect what the user was told
+        get_async_client().invalidate(headers)
+        self.start()
+        self._wake.set()
+        return True
+
+    def start(self) -> None:
+        """Start the delivery worker on the running event loop if it is not running."""
+        if self._worker is None or self._worker.done():
+            self._wake = asyncio.Event()
+            # A task copies the context it is created in; starting the worker from an
+            # action must not hand it that action's deadline or trace
+            self._worker = contextvars.Context().run(asyncio.ensure_future, self._run())
+
+    async def stop(self) -> None:
+        """Stop the delivery worker; undelivered updates stay queued."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                writes = await self._call(self._claim_due)
+            except sqlite3.Error as e:
+                logger.error(f"Write queue unavailable: {e}")
+                writes = []
+            except Exception:
+                logger.exception("Could not read the write queue")
+                writes = []
+
+            if writes:
+                await asyncio.gather(*(self._deliver(write) for write in writes))
+                continue
+
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + 3600
+                try:
+                    await self._call(self._purge_failed)
+                except Exception:
+                    logger.exception("Could not purge failed writes")
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, write: PendingWrite) -> None:
+        """Send one queued update and record the outcome.
+
+        Never raises: if the outcome cannot be recorded, the lease runs out and
+        the update is claimed again.
+        """
+        try:
+            await self._send(write)
+        except Exception:
+            logger.exception(f"Could not deliver queued {write.method} {write.endpoint_name}")
+
+    async def _send(self, write: PendingWrite) -> None:
+        try:
+            response = await get_async_client().request(
+                write.method,
+                write.endpoint_name,
+                headers=write.headers,
+                params=write.params,
+                json=write.body,
+                idempotency_key=write.idempotency_key
+            )
+        except APIError as e:
+            await self._retry_or_fail(write, str(e))
+            return
+        except Exception as e:
+            # Not a backend failure (e.g. an unknown endpoint): retrying will not help
+            await self._call(self._mark_failed, write.id, repr(e))
+            metrics_stuff.count_queued_write("failed")
+            logger.exception(f"Queued {write.method} {write.endpoint_name} cannot be sent")
+            return
+
+        if response.is_success:
+            await self._call(self._delete, write.id)
+            metrics_stuff.count_queued_write("delivered")
+        elif response.status_code >= 500 or response.status_code == 429:
+            await self._retry_or_fail(write, f"status {response.status_code}")
+        else:
+            await self._call(self._mark_failed, write.id, f"status {response.status_code}")
+            metrics_stuff.count_queued_write("failed")
+            logger.error(f"Queued {write.method} {write.endpoint_name} rejected with status {response.status_code}")
+
+    async def _retry_or_fail(self, write: PendingWrite, error: str) -> None:
+        attempts = write.attempts + 1
+        if self.max_attempts and attempts >= self.max_attempts:
+            await self._call(self._mark_failed, write.id, error)
+            metrics_stuff.count_queued_write("failed")
+            logger.error(f"Giving up on queued {write.method} {write.endpoint_name} after {attempts} attempts: {error}")
+            return
+
+        delay = random.uniform(0, min(APIConfig.WRITE_QUEUE_MAX_DELAY, APIConfig.RETRY_DELAY * (2 ** attempts)))
+        await self._call(self._reschedule, write.id, delay, error)
+        metrics_stuff.count_queued_write("retried")
+        logger.warning(f"Queued {write.method} {write.endpoint_name} will be retried in {delay:.1f}s: {error}")
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # The methods below run on the queue's SQLite thread
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            # The queue holds bearer tokens: create the file for its owner only.
+            # SQLite gives the -wal and -shm files the same permissions.
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            os.chmod(self.path, 0o600)
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _insert(self, method: str, endpoint_name: str, headers: Dict[str, str],
+                params: Optional[Dict[str, Any]], body: Optional[Dict[str, Any]], idempotency_key: str) -> None:
+        now = time.time()
+        self._db().execute(
+            "INSERT INTO pending_writes (user_key, method, endpoint_name, headers, params, body,"
+            " idempotency_key, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (_user_key(headers), method, endpoint_name, json.dumps(headers),
+             json.dumps(params) if params is not None else None,
+             json.dumps(body) if body is not None else None,
+             idempotency_key, now, now)
+        )
+
+    def _claim_due(self) -> List[PendingWrite]:
+        """Lease the oldest pending update of each user that is due."""
+        now = time.time()
+        db = self._db()
+        rows = db.execute(
+            "SELECT id, method, endpoint_name, headers, params, body, idempotency_key, attempts"
+            " FROM pending_writes WHERE id IN"
+            " (SELECT MIN(id) FROM pending_writes WHERE status = 'pending' GROUP BY user_key)"
+            " AND next_attempt_at <= ? AND lease_until <= ? ORDER BY id LIMIT ?",
+            (now, now, self.batch_size)
+        ).fetchall()
+
+        claimed = []
+        for row in rows:
+            cursor = db.execute(
+                "UPDATE pending_writes SET lease_until = ? WHERE id = ? AND status = 'pending' AND lease_until <= ?",
+                (now + self.lease, row[0], now)
+            )
+            if cursor.rowcount == 1:
+                claimed.append(PendingWrite(
+                    id=row[0], method=row[1], endpoint_name=row[2], headers=json.loads(row[3]),
+                    params=json.loads(row[4]) if row[4] is not None else None,
+                    body=json.loads(row[5]) if row[5] is not None else None,
+                    idempotency_key=row[6], attempts=row[7]
+                ))
+        return claimed
+
+    def _delete(self, write_id: int) -> None:
+        self._db().execute("DELETE FROM pending_writes WHERE id = ?", (write_id,))
+
+    def _reschedule(self, write_id: int, delay: float, error: str) -> None:
+        self._db().execute(
+            "UPDATE pending_writes SET attempts = attempts + 1, next_attempt_at = ?, lease_until = 0,"
+            " last_error = ? WHERE id = ?",
+            (time.time() + delay, error, write_id)
+        )
+
+    def _mark_failed(self, write_id: int, error: str) -> None:
+        self._db().execute(
+            "UPDATE pending_writes SET status = 'failed', attempts = attempts + 1, lease_until = 0,"
+            " headers = '{}', last_error = ? WHERE id = ?",
+            (error, write_id)
+        )
+
+    def _purge_failed(self) -> None:
+        self._db().execute(
+            "DELETE FROM pending_writes WHERE status = 'failed' AND created_at < ?",
+            (time.time() - self.failed_retention,)
+        )
+
+def _user_key(headers: Dict[str, str]) -> str:
+    """Group updates per user without storing the token a second time."""
+    return hashlib.sha256(headers.get("Authorization", "").encode()).hexdigest()
+
+_write_queue: Optional[WriteBehindQueue] = None
+
+def get_write_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue."""
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteBehindQueue()
+    return _write_queue